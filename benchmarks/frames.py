@@ -0,0 +1,71 @@
+"""Synthetic DataFrames for the benchmarks, generated from a fixed seed so every run measures the same data"""
+import string
+
+import numpy as np
+import pandas as pd
+
+SEED = 0
+
+
+def numeric_frame(rows: int, columns: int) -> pd.DataFrame:
+    """Half integer and half float columns of varying magnitude"""
+    rng = np.random.default_rng(SEED)
+    data = {}
+    for column in range(columns):
+        scale = 10.0 ** rng.integers(0, 12)
+        values = rng.normal(0, scale, rows)
+        data[f"number_{column}"] = values.astype(np.int64) if column % 2 else values
+    return pd.DataFrame(data)
+
+
+def string_frame(rows: int, columns: int) -> pd.DataFrame:
+    """Strings of 1 to 40 ASCII letters, with a few missing values"""
+    rng = np.random.default_rng(SEED)
+    letters = np.array(list(string.ascii_letters))
+    #a pool of distinct strings drawn from at random, as building every string separately would dominate setup
+    pool = np.array(["".join(rng.choice(letters, length)) for length in rng.integers(1, 41, 1000)], dtype=object)
+    data = {}
+    for column in range(columns):
+        values = pool[rng.integers(0, len(pool), rows)]
+        values[rng.random(rows) < 0.01] = None
+        data[f"text_{column}"] = values
+    return pd.DataFrame(data)
+
+
+def categorical_frame(rows: int, columns: int) -> pd.DataFrame:
+    """Categorical columns of 50 string categories"""
+    rng = np.random.default_rng(SEED)
+    categories = [f"category {'x' * length}" for length in range(50)]
+    return pd.DataFrame({f"category_{column}": pd.Categorical.from_codes(rng.integers(0, len(categories), rows), categories)
+                         for column in range(columns)})
+
+
+def datetime_frame(rows: int, columns: int) -> pd.DataFrame:
+    """datetime64 columns spanning about 30 years, with a few NaT"""
+    rng = np.random.default_rng(SEED)
+    start = np.datetime64("2000-01-01T00:00:00", "s").astype(np.int64)
+    data = {}
+    for column in range(columns):
+        values = pd.Series(pd.to_datetime(start + rng.integers(0, 30 * 365 * 86400, rows), unit="s"))
+        values[rng.random(rows) < 0.01] = pd.NaT
+        data[f"when_{column}"] = values
+    return pd.DataFrame(data)
+
+
+def mixed_frame(rows: int, columns: int) -> pd.DataFrame:
+    """An even mix of the numeric, string, categorical and datetime columns above"""
+    share = max(columns // 4, 1)
+    return pd.concat([numeric_frame(rows, share), string_frame(rows, share), categorical_frame(rows, share), datetime_frame(rows, share)],
+                     axis=1)
+
+
+#the kinds of column benchmarked, by name
+KINDS = {"numeric": numeric_frame,
+         "string": string_frame,
+         "categorical": categorical_frame,
+         "datetime": datetime_frame,
+         "mixed": mixed_frame}
+
+#(rows, columns) of each shape of frame benchmarked
+SHAPES = {"tall": (500_000, 4),
+          "wide": (200, 1_000)}
@@ -0,0 +1,147 @@
+"""Times width computation and end-to-end export on synthetic frames, and compares the timings with a stored baseline.
+
+    python benchmarks/run.py                                  #run every benchmark and print the timings
+    python benchmarks/run.py --compare benchmarks/baseline.json  #also report how each changed since the baseline
+    python benchmarks/run.py --save benchmarks/baseline.json     #store the timings as the new baseline
+    python benchmarks/run.py --filter widths.string              #run only benchmarks whose name contains this
+
+Timings depend on the machine, so a baseline should be saved on the machine it will be compared on.
+"""
+import argparse
+import json
+import platform
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from timeit import Timer
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dataframe_to_autosize_excel import WidthCache, append_autosize_excel, excel_column_width, maximum_character_widths, to_autosize_excel
+from frames import KINDS, SHAPES
+
+#rows of the frames exported end to end, which is far slower per row than measuring widths
+EXPORT_ROWS = 20_000
+EXPORT_COLUMNS = 8
+#shape of the frame measured with and without its widths in a WidthCache
+CACHE_SHAPE = (200_000, 4)
+#shape of the sheet rows are appended to, and how many rows are appended to it
+APPEND_SHAPE = (100_000, 4)
+APPENDED_ROWS = 10
+#a ratio to the baseline beyond which a benchmark is reported as a regression or an improvement
+DEFAULT_THRESHOLD = 1.5
+
+
+def benchmarks(workdir: Path) -> dict:
+    """Gets every benchmark, by name, as a (setup, statement) pair of functions.  setup is untimed and its result is passed to statement."""
+    cases = {}
+    for kind, make_frame in KINDS.items():
+        for shape, (rows, columns) in SHAPES.items():
+            cases[f"widths.{kind}.{shape}"] = (lambda make_frame=make_frame, rows=rows, columns=columns: make_frame(rows, columns),
+                                               lambda df: maximum_character_widths(df, width_sampling=False))
+        #one worker per CPU, which on a single CPU measures serially
+        cases[f"widths_n_jobs.{kind}.tall"] = (lambda make_frame=make_frame: make_frame(*SHAPES["tall"]),
+                                               lambda df: maximum_character_widths(df, width_sampling=False, n_jobs=-1))
+        cases[f"export.{kind}"] = (lambda make_frame=make_frame: make_frame(EXPORT_ROWS, EXPORT_COLUMNS),
+                                   lambda df, kind=kind: to_autosize_excel(df, workdir / f"{kind}.xlsx"))
+        cases[f"export_native.{kind}"] = (lambda make_frame=make_frame: make_frame(EXPORT_ROWS, EXPORT_COLUMNS),
+                                          lambda df, kind=kind: to_autosize_excel(df, workdir / f"{kind}.xlsx", native_writer=True))
+
+    #only text measured character by character is cached, so a hit must be faster than measuring it again
+    cases["width_cache.miss"] = (lambda: KINDS["string"](*CACHE_SHAPE),
+                                 lambda df: _cached_widths(df, WidthCache()))
+    cases["width_cache.hit"] = (lambda: _warm_cache(KINDS["string"](*CACHE_SHAPE)),
+                                lambda warmed: _cached_widths(*warmed))
+
+    #an append must beat exporting every row again, which is what it saves
+    cases["append.rows"] = (lambda: _appendable_sheet(workdir / "append.xlsx"),
+                            lambda sheet: append_autosize_excel(*sheet))
+    cases["append.reexport"] = (lambda: KINDS["string"](APPEND_SHAPE[0] + APPENDED_ROWS, APPEND_SHAPE[1]),
+                                lambda df: to_autosize_excel(df, workdir / "reexport.xlsx", verbose=False))
+
+    character_widths = np.random.default_rng(0).integers(1, 255, 10_000).tolist()
+    cases["column_width.default"] = (lambda: character_widths,
+                                     lambda widths: [excel_column_width(w) for w in widths])
+    cases["column_width.calibri"] = (lambda: character_widths,
+                                     lambda widths: [excel_column_width(w, 11, "calibri") for w in widths])
+    return cases
+
+
+def _cached_widths(df, cache: WidthCache) -> dict:
+    return maximum_character_widths(df, width_sampling=False, east_asian_width=True, width_cache=cache)
+
+
+def _warm_cache(df) -> tuple:
+    cache = WidthCache()
+    _cached_widths(df, cache)
+    return df, cache
+
+
+def _appendable_sheet(path: Path) -> tuple:
+    df = KINDS["string"](*APPEND_SHAPE)
+    to_autosize_excel(df, path, store_widths=True, verbose=False)
+    return df.iloc[:APPENDED_ROWS], path
+
+
+def run(name_filter: str, repeat: int) -> dict:
+    """Runs the benchmarks, returning the best of repeat timings of each in seconds"""
+    timings = {}
+    with TemporaryDirectory() as workdir:
+        for name, (setup, statement) in benchmarks(Path(workdir)).items():
+            if name_filter and name_filter not in name:
+                continue
+            data = setup()
+            timer = Timer(lambda: statement(data))
+            #quick benchmarks are looped until each run takes long enough to time reliably, which also warms up any caches
+            number, _ = timer.autorange()
+            #the best of several runs is the one least disturbed by everything else the machine was doing
+            timings[name] = min(timer.repeat(repeat, number)) / number
+            print(f"{name:<32}{timings[name]:>12.4f}s", flush=True)
+    return timings
+
+
+def compare(timings: dict, baseline: dict, threshold: float) -> bool:
+    """Prints each timing against its baseline, returning True if any benchmark regressed"""
+    print(f"\n{'benchmark':<32}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    regressed = False
+    for name, seconds in timings.items():
+        if name not in baseline:
+            print(f"{name:<32}{'-':>12}{seconds:>11.4f}s{'-':>8}  new")
+            continue
+        ratio = seconds / baseline[name]
+        change = "slower" if ratio > threshold else "faster" if ratio < 1 / threshold else ""
+        regressed = regressed or change == "slower"
+        print(f"{name:<32}{baseline[name]:>11.4f}s{seconds:>11.4f}s{ratio:>8.2f}  {change}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=3, help="how many times to run each benchmark")
+    parser.add_argument("--save", type=Path, help="store the timings as a baseline in this file")
+    parser.add_argument("--compare", type=Path, help="compare the timings with the baseline in this file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="the ratio to the baseline reported as a change")
+    args = parser.parse_args()
+
+    timings = run(args.filter, args.repeat)
+
+    if args.save:
+        environment = {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+                       "xlsxwriter": xlsxwriter.__version__, "machine": platform.machine(), "processor": platform.processor()}
+        args.save.write_text(json.dumps({"environment": environment, "timings": timings}, indent=2) + "\n")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        print(f"\nbaseline environment: {baseline['environment']}")
+        if compare(timings, baseline["timings"], args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
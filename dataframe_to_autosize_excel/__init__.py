@@ -1 +1,8 @@
-from .dataframe_to_autosize_excel import excel_column_width, maximum_character_widths, to_autosize_excel
+from .dataframe_to_autosize_excel import ExportView, estimate_character_widths, excel_column_width, export_view, maximum_character_widths, row_line_counts, to_autosize_excel, to_autosize_excel_sheets
+from .widths import SampledWidth
+from .streaming import to_autosize_excel_chunked
+from .cache import CacheInfo, WidthCache
+from .stats import ExportStats
+from .append import append_autosize_excel
+from .asynchronous import to_autosize_excel_async
+from .arrow import to_autosize_excel_arrow
@@ -0,0 +1,321 @@
+import re
+from concurrent.futures import Executor
+from datetime import date, datetime
+from decimal import Decimal
+from math import isnan
+from numbers import Real
+from os import PathLike, replace
+from os.path import expandvars
+from pathlib import Path
+from posixpath import dirname, join, normpath
+from shutil import copymode
+from tempfile import NamedTemporaryFile
+from typing import Dict, List, Sequence, Tuple, Union
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, unescape
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import numpy as np
+from pandas import DataFrame
+from xlsxwriter.utility import xl_cell_to_rowcol, xl_rowcol_to_cell
+
+from .cache import WidthCache
+from .dataframe_to_autosize_excel import (DEFAULT_ROW_HEIGHT, estimate_character_widths, excel_column_width, export_view,
+                                          row_line_counts)
+from .fonts import DEFAULT_MAX_DIGIT_WIDTH
+from .metadata import metadata_properties, metadata_sheet, read_metadata_properties
+from .native import excel_serials, rendered_value
+
+#xlsxwriter stores column widths with the padding Excel adds around the digits of Calibri 11
+_COLUMN_PADDING = 5
+#the parts of an xlsx package an append reads or rewrites, besides the sheet itself
+_WORKBOOK = "xl/workbook.xml"
+_WORKBOOK_RELATIONSHIPS = "xl/_rels/workbook.xml.rels"
+_STYLES = "xl/styles.xml"
+_CUSTOM_PROPERTIES = "docProps/custom.xml"
+_NAMESPACES = {"main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+               "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+               "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+               "custom": "http://schemas.openxmlformats.org/officeDocument/2006/custom-properties"}
+#the format id of custom document properties, which Excel requires
+_PROPERTY_FMTID = "{D5CDD505-2E9C-101B-9397-08002B2CF9AE}"
+#the most characters Excel holds in a cell, xlsxwriter truncates longer strings to this
+_EXCEL_STRING_MAX = 32767
+#characters not allowed in XML are written as _xHHHH_, and a literal _xHHHH_ with its underscore escaped, as xlsxwriter writes them
+_CONTROL_CHARACTERS = re.compile(r"[\x00-\x08\x0b-\x1f]")
+_ESCAPE_LOOKALIKES = re.compile(r"(_x[0-9a-fA-F]{4}_)")
+_EDGE_WHITESPACE = re.compile(r"^\s|\s$")
+_XML_ATTRIBUTES = re.compile(r'([\w:]+)="([^"]*)"')
+_EMPTY_CELLS = re.compile(rb"<sheetData\s*/>")
+
+
+def append_autosize_excel(df: DataFrame,
+                          outfile: PathLike,
+                          sheet_name: str='Sheet1',
+                          columns: Union[Sequence[str], List[str]]=None,
+                          index: bool=True,
+                          width_sampling: Union[bool, int]=None,
+                          sampling_method: str='random',
+                          n_jobs: int=None,
+                          executor: Union[str, Executor]='thread',
+                          width_cache: WidthCache=None) -> Path:
+    """Appends rows below the data of a sheet written by to_autosize_excel with store_widths=True, widening any column the new rows need more room in.  Only the new rows are measured and rendered: the widths of the rows already in the sheet are read from the workbook, and the XML of their cells is copied as it is, without being parsed.  The workbook is still decompressed and recompressed as a whole, which takes far less time than writing its rows again.  The new rows are rendered and measured with the options the sheet was written with, and the stored widths are updated for the next append.
+
+    Arguments:
+        df {DataFrame} -- The rows to be appended, with the same columns as the data already in the sheet
+        outfile {PathLike} -- A pathlike object representing the full path and filename of the xlsx file to append to
+
+    Keyword Arguments:
+        sheet_name {str} -- The sheet of the workbook to append the rows to (default: {'Sheet1'})
+        columns {Union[Sequence[str], List[str]]} -- If given, only these columns will be written to the file (default: {None})
+        index {bool} -- If true, write the index columns in the output (default: {True})
+        width_sampling {Union[bool, int]} -- None to estimate widths from a sample of rows only for very long frames, True to always sample, False to always measure every row, or the number of rows to sample (default: {None})
+        sampling_method {str} -- How rows are sampled when estimating widths, 'random' or 'stratified' (default: {'random'})
+        n_jobs {int} -- The number of workers to measure columns with.  None or 1 measures serially, -1 uses one worker per CPU. (default: {None})
+        executor {Union[str, Executor]} -- 'thread' or 'process' to choose the kind of worker pool used when n_jobs is set, or an existing Executor to use.  Processes are sent a pickled copy of their columns, which can take longer than measuring them. (default: {'thread'})
+        width_cache {WidthCache} -- If given, columns already measured with the same content and options take their width from this cache.  Only text measured with font, east_asian_width or multiline is cached, as every other column is cheaper to measure than to look up. (default: {None})
+
+    Raises:
+        ValueError: Raised if the sheet has no stored widths, or the rows have a different number of columns than it
+
+    Returns:
+        Path -- A Path object representing the successfully written xlsx output
+    """
+    path = Path(expandvars(outfile))
+    with ZipFile(path) as package:
+        names = package.namelist()
+        properties = package.read(_CUSTOM_PROPERTIES).decode("utf-8") if _CUSTOM_PROPERTIES in names else None
+        metadata = read_metadata_properties(_custom_properties(properties)).get(sheet_name) if properties else None
+        if metadata is None:
+            raise ValueError(f"Sheet {sheet_name} of {path} has no stored widths, it must be written with store_widths=True before rows can be appended to it")
+        sheet_part, date_1904 = _sheet_part(package, sheet_name)
+        styles = package.read(_STYLES).decode("utf-8")
+
+    options = metadata["options"]
+    view = export_view(df, columns, False, index, None)
+    if len(view.data.columns) != len(metadata["widths"]):
+        raise ValueError(f"Rows of {len(view.data.columns)} columns cannot be appended to a sheet of {len(metadata['widths'])} columns")
+
+    estimates = estimate_character_widths(view.data, False, view.labels,
+                                          width_sampling=width_sampling,
+                                          sampling_method=sampling_method,
+                                          n_jobs=n_jobs,
+                                          executor=executor,
+                                          excel_datetime_format=options["excel_datetime_format"],
+                                          na_rep=options["na_rep"],
+                                          float_format=options["float_format"],
+                                          inf_rep=options["inf_rep"],
+                                          font=options["font"],
+                                          fontsize=options["fontsize"],
+                                          east_asian_width=options["east_asian_width"],
+                                          multiline=options["multiline"],
+                                          width_cache=width_cache,
+                                          #sheets stored before widths could be limited have no limits
+                                          max_width=options.get("max_width"),
+                                          min_width=options.get("min_width"))
+    #a column only ever grows, so the widest of the stored width and the new rows' width is the width of every row
+    widths = [np.fmax(np.nan if stored is None else stored, estimates[column_name].width)
+              for stored, column_name in zip(metadata["widths"], view.data.columns)]
+    #a column of nothing but missing values has no width of its own
+    column_widths = {metadata["startcol"] + offset: _stored_column_width(excel_column_width(width, options["fontsize"], options["font"]))
+                     for offset, width in enumerate(widths) if not isnan(width)}
+
+    styles, number_format_styles = _number_format_styles(styles, {datetime: options["excel_datetime_format"], date: options["excel_date_format"]})
+    first_row = metadata["startrow"] + metadata["header"] + metadata["rows"]
+    metadata.update(widths=[None if isnan(w) else float(w) for w in widths], rows=metadata["rows"] + len(view.data))
+    properties = _replace_custom_properties(properties, sheet_name, metadata_properties(sheet_name, metadata))
+
+    #the package is written beside the workbook and only replaces it once it is complete
+    with ZipFile(path) as package, NamedTemporaryFile(dir=path.parent, suffix=path.suffix, delete=False) as temporary:
+        try:
+            with ZipFile(temporary, "w", ZIP_DEFLATED) as patched:
+                for info in package.infolist():
+                    if info.filename == sheet_part:
+                        sheet = _patched_sheet(package.read(info), view.data, first_row, metadata["startcol"], column_widths,
+                                               number_format_styles, date_1904, options)
+                    else:
+                        sheet = {_STYLES: styles, _CUSTOM_PROPERTIES: properties}.get(info.filename)
+                    patched.writestr(info, package.read(info) if sheet is None else sheet, ZIP_DEFLATED)
+        except BaseException:
+            temporary.close()
+            Path(temporary.name).unlink()
+            raise
+    copymode(path, temporary.name)
+    replace(temporary.name, path)
+    return path
+
+
+def _custom_properties(properties: str) -> Dict[str, str]:
+    root = ElementTree.fromstring(properties)
+    #every property holds a single value of some type, of which only the text of metadata_properties' strings matters
+    return {prop.get("name"): "".join(prop[0].itertext()) for prop in root.findall("custom:property", _NAMESPACES) if len(prop)}
+
+
+def _replace_custom_properties(properties: str, sheet_name: str, replacements: Dict[str, str]) -> str:
+    def kept(match: re.Match) -> str:
+        name = unescape(re.search(r'\bname="([^"]*)"', match.group()).group(1), {"&quot;": '"'})
+        return "" if metadata_sheet(name) == sheet_name else match.group()
+
+    #the other properties are kept exactly as they are, whatever their types
+    properties = re.sub(r"<property\b.*?</property>", kept, properties, flags=re.DOTALL)
+    pid = max(map(int, re.findall(r'<property\b[^>]*\bpid="(\d+)"', properties)), default=1)
+    added = "".join(f'<property fmtid="{_PROPERTY_FMTID}" pid="{pid + number}" name={_quoted(name)}><vt:lpwstr>{escape(value)}</vt:lpwstr></property>'
+                    for number, (name, value) in enumerate(replacements.items(), 1))
+    return properties.replace("</Properties>", added + "</Properties>")
+
+
+def _sheet_part(package: ZipFile, sheet_name: str) -> Tuple[str, bool]:
+    workbook = ElementTree.fromstring(package.read(_WORKBOOK))
+    sheet = next((sheet for sheet in workbook.iterfind("main:sheets/main:sheet", _NAMESPACES) if sheet.get("name") == sheet_name), None)
+    if sheet is None:
+        raise ValueError(f"Workbook has no sheet {sheet_name}")
+    relationship_id = sheet.get(f"{{{_NAMESPACES['r']}}}id")
+    relationships = ElementTree.fromstring(package.read(_WORKBOOK_RELATIONSHIPS))
+    target = next(rel.get("Target") for rel in relationships.iterfind("rel:Relationship", _NAMESPACES) if rel.get("Id") == relationship_id)
+    #targets are relative to the workbook part unless they begin at the root of the package
+    part = target.lstrip("/") if target.startswith("/") else normpath(join(dirname(_WORKBOOK), target))
+    properties = workbook.find("main:workbookPr", _NAMESPACES)
+    return part, properties is not None and properties.get("date1904") in ("1", "true")
+
+
+def _number_format_styles(styles: str, number_formats: Dict[type, str]) -> Tuple[str, Dict[type, int]]:
+    #cells of a number format take the same style as xlsxwriter gives them, adding it if the workbook doesn't have it yet
+    indices = {}
+    for kind, number_format in number_formats.items():
+        number_format_ids = {unescape(code, {"&quot;": '"'}): int(number_format_id) for number_format_id, code in re.findall(r'<numFmt numFmtId="(\d+)" formatCode="([^"]*)"/>', styles)}
+        if number_format not in number_format_ids:
+            number_format_ids[number_format] = max(number_format_ids.values(), default=163) + 1
+            numfmt = f'<numFmt numFmtId="{number_format_ids[number_format]}" formatCode={_quoted(number_format)}/>'
+            styles = _added_element(styles, "numFmts", numfmt, before="<fonts")
+        xf = f'<xf numFmtId="{number_format_ids[number_format]}" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        xfs = re.findall(r"<xf\b[^>]*?(?:/>|>.*?</xf>)", re.search(r"<cellXfs\b.*?</cellXfs>", styles, re.DOTALL).group(), re.DOTALL)
+        if xf not in xfs:
+            styles = _added_element(styles, "cellXfs", xf)
+            xfs.append(xf)
+        indices[kind] = xfs.index(xf)
+    return styles, indices
+
+
+def _added_element(xml: str, parent: str, element: str, before: str = None) -> str:
+    #the parent's count attribute counts its children, so it grows with them
+    match = re.search(rf'<{parent} count="(\d+)">', xml)
+    if match is None:
+        return xml.replace(before, f'<{parent} count="1">{element}</{parent}>{before}', 1)
+    opening = f'<{parent} count="{int(match.group(1)) + 1}">'
+    return xml[:match.start()] + opening + xml[match.end():].replace(f"</{parent}>", f"{element}</{parent}>", 1)
+
+
+def _patched_sheet(sheet: bytes, data: DataFrame, first_row: int, startcol: int, column_widths: Dict[int, float],
+                   number_format_styles: Dict[type, int], date_1904: bool, options: dict) -> bytes:
+    #everything before the cells is short and is rewritten, the cells already in the sheet are copied byte for byte
+    cells_start = sheet.index(b"<sheetData")
+    head = sheet[:cells_start].decode("utf-8")
+    columns = _columns(head)
+    for column, width in column_widths.items():
+        columns.setdefault(column, {})
+        columns[column].update(width=repr(width), customWidth="1")
+    cols = "".join(f"<col{_attributes(dict(min=str(first + 1), max=str(last + 1), **attributes))}/>" for first, last, attributes in _column_runs(columns))
+    #<cols> comes right before <sheetData>, and only if it has a column in it
+    cols = f"<cols>{cols}</cols>" if cols else ""
+    head = re.sub(r"<cols>.*?</cols>", "", head, flags=re.DOTALL)
+    head = re.sub(r"<dimension\b[^>]*/>", lambda match: _dimension(match.group(), first_row + len(data) - 1, startcol + len(data.columns) - 1), head)
+
+    column_styles = {column: int(attributes["style"]) for column, attributes in columns.items() if "style" in attributes}
+    rows = _rows(data, first_row, startcol, column_styles, number_format_styles, date_1904, options).encode("utf-8")
+    #the sheet is only copied once, when its parts are joined
+    cells = memoryview(sheet)
+    empty = _EMPTY_CELLS.match(sheet, cells_start)
+    if empty:
+        existing, tail = b"", cells[empty.end():]
+    else:
+        cells_end = sheet.rindex(b"</sheetData>")
+        existing, tail = cells[cells_start + len(b"<sheetData>"):cells_end], cells[cells_end + len(b"</sheetData>"):]
+    return b"".join([head.encode("utf-8"), cols.encode("utf-8"), b"<sheetData>", existing, rows, b"</sheetData>", tail])
+
+
+def _columns(head: str) -> Dict[int, dict]:
+    #the attributes of each zero-indexed column, one by one, however they were grouped into ranges
+    columns = {}
+    for col in re.findall(r"<col\b([^>]*)/>", head):
+        attributes = {name: unescape(value, {"&quot;": '"'}) for name, value in _XML_ATTRIBUTES.findall(col)}
+        first, last = int(attributes.pop("min")), int(attributes.pop("max"))
+        for column in range(first - 1, last):
+            columns[column] = dict(attributes)
+    return columns
+
+
+def _column_runs(columns: Dict[int, dict]) -> list:
+    #adjacent columns alike in every attribute are written as one range again
+    runs = []
+    for column in sorted(columns):
+        if runs and runs[-1][1] == column - 1 and runs[-1][2] == columns[column]:
+            runs[-1][1] = column
+        else:
+            runs.append([column, column, columns[column]])
+    return runs
+
+
+def _dimension(dimension: str, last_row: int, last_column: int) -> str:
+    cells = re.search(r'ref="([^"]*)"', dimension).group(1).split(":")
+    first_row, first_column = xl_cell_to_rowcol(cells[0])
+    end_row, end_column = xl_cell_to_rowcol(cells[-1])
+    end = xl_rowcol_to_cell(max(end_row, last_row), max(end_column, last_column))
+    return f'<dimension ref="{xl_rowcol_to_cell(first_row, first_column)}:{end}"/>'
+
+
+def _rows(data: DataFrame, first_row: int, startcol: int, column_styles: Dict[int, int],
+          number_format_styles: Dict[type, int], date_1904: bool, options: dict) -> str:
+    heights = {}
+    if options["multiline"]:
+        row_height = DEFAULT_ROW_HEIGHT * options["fontsize"] / 11
+        lines = row_line_counts(data)
+        heights = {int(row): row_height * lines[row] for row in np.flatnonzero(lines > 1)}
+
+    rows = []
+    for row, values in enumerate(data.itertuples(index=False, name=None)):
+        cells = []
+        for column, value in enumerate(values, startcol):
+            value, kind = rendered_value(value, options["na_rep"], options["float_format"], options["inf_rep"])
+            #cells without a number format of their own take their column's, as xlsxwriter writes them
+            style = number_format_styles[kind] if kind in number_format_styles else column_styles.get(column)
+            cells.append(_cell(xl_rowcol_to_cell(first_row + row, column), value, kind, style, date_1904))
+        height = f' ht="{heights[row]:g}" customHeight="1"' if row in heights else ""
+        rows.append(f'<row r="{first_row + row + 1}"{height}>{"".join(cells)}</row>')
+    return "".join(rows)
+
+
+def _cell(reference: str, value, kind: type, style: int, date_1904: bool) -> str:
+    if value is None or (kind is None and isinstance(value, str) and value == ""):
+        return ""
+    attributes = f' r="{reference}"' + (f' s="{style}"' if style else "")
+    if kind in (datetime, date):
+        #the same serial date xlsxwriter's write_datetime stores
+        serial = excel_serials(np.array([value], dtype="datetime64[us]"), date_1904, time_of_day=kind is datetime)[0]
+        return f"<c{attributes}><v>{serial:.16G}</v></c>"
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c{attributes} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (Real, Decimal)):
+        return f"<c{attributes}><v>{float(value):.16G}</v></c>"
+    value = str(value)
+    if kind is None and value.startswith("="):
+        #strings read as formulas by DataFrame.to_excel's writer are formulas here too
+        return f"<c{attributes}><f>{escape(value[1:])}</f><v>0</v></c>"
+    value = _CONTROL_CHARACTERS.sub(lambda match: f"_x{ord(match.group()):04X}_", _ESCAPE_LOOKALIKES.sub(r"_x005F\1", value[:_EXCEL_STRING_MAX]))
+    value = value.replace("\ufffe", "_xFFFE_").replace("\uffff", "_xFFFF_")
+    preserve = ' xml:space="preserve"' if _EDGE_WHITESPACE.search(value) else ""
+    return f'<c{attributes} t="inlineStr"><is><t{preserve}>{escape(value)}</t></is></c>'
+
+
+def _attributes(attributes: dict) -> str:
+    return "".join(f" {name}={_quoted(value)}" for name, value in attributes.items())
+
+
+def _quoted(value: str) -> str:
+    return '"' + escape(value, {'"': "&quot;"}) + '"'
+
+
+def _stored_column_width(width: float) -> float:
+    #the same conversion xlsxwriter makes, so a column widened here is as wide as if it had been written this wide
+    if width < 1:
+        return int(int(width * (DEFAULT_MAX_DIGIT_WIDTH + _COLUMN_PADDING) + 0.5) / DEFAULT_MAX_DIGIT_WIDTH * 256) / 256
+    return int((int(width * DEFAULT_MAX_DIGIT_WIDTH + 0.5) + _COLUMN_PADDING) / DEFAULT_MAX_DIGIT_WIDTH * 256) / 256
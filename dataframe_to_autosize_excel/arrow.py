@@ -0,0 +1,214 @@
+import sys
+from datetime import date, datetime
+from os import PathLike
+from pathlib import Path
+from time import perf_counter
+from typing import BinaryIO, List, Sequence, Tuple, Union
+
+import numpy as np
+from pandas import Series
+from xlsxwriter import Workbook
+
+from .dataframe_to_autosize_excel import DEFAULT_ROW_HEIGHT, _output_target, excel_column_width, logger, row_line_counts
+from .formats import excel_format_width
+from .native import write_frame
+from .stats import ExportStats
+from .widths import _float_width, _measures_characters, _widest, clamp_width, longest_arrow_string, text_length
+
+#rows converted to pandas at a time while writing, so only one batch of the table is ever held as Python objects
+ARROW_BATCH_ROWS = 65_536
+
+
+def as_arrow_table(data):
+    """Gets a pyarrow Table of the same data as a pyarrow Table or RecordBatch, or a polars DataFrame, without copying it
+
+    Arguments:
+        data -- The data to be output
+
+    Returns:
+        The data as a pyarrow Table, or None if it is none of these (e.g. a pandas DataFrame)
+    """
+    #neither library is a dependency, but if data is one of their objects then the library has already been imported
+    pa = sys.modules.get("pyarrow")
+    pl = sys.modules.get("polars")
+    if pa is not None and isinstance(data, pa.Table):
+        return data
+    if pa is not None and isinstance(data, pa.RecordBatch):
+        return pa.Table.from_batches([data])
+    if pl is not None and isinstance(data, pl.DataFrame):
+        return data.to_arrow()
+    return None
+
+
+def to_autosize_excel_arrow(table,
+                            outfile: Union[PathLike, BinaryIO],
+                            consider_headers: bool = True,
+                            sheet_name: str='Sheet1',
+                            na_rep: str='',
+                            float_format: str=None,
+                            columns: Union[Sequence[str], List[str]]=None,
+                            header: Union[bool, List[str]]=True,
+                            startrow: int=0,
+                            startcol: int=0,
+                            inf_rep: str='inf',
+                            verbose: bool=True,
+                            freeze_panes: Tuple[int,int]=None,
+                            excel_date_format: str = "yyyy-mm-dd",
+                            excel_datetime_format: str = "yyyy-mm-dd  hh:mm:ss",
+                            font: str=None,
+                            fontsize: float=11,
+                            east_asian_width: bool=False,
+                            multiline: bool=False,
+                            stats: ExportStats=None,
+                            max_width: float=None,
+                            min_width: float=None) -> Union[Path, BinaryIO]:
+    """Same as to_autosize_excel, but for a pyarrow Table, which is never converted to a pandas DataFrame as a whole.  Widths are computed with Arrow compute kernels on the table's own buffers, and rows are written one record batch at a time.  to_autosize_excel calls this for pyarrow and polars data.  Requires pyarrow.
+
+    Arguments:
+        table {pyarrow.Table} -- The data to be output into an xlsx file
+        outfile {Union[PathLike, BinaryIO]} -- A pathlike object representing the full path and filename of the output xlsx file, or a writable binary file-like object (e.g. BytesIO) to write it to
+
+    Keyword Arguments:
+        consider_headers {bool} -- If true, consider the width of the column headers when sizing columns (default: {True})
+        sheet_name {str} -- The sheet of the workbook to write the data(default: {'Sheet1'})
+        na_rep {str} -- How null values should be represented in the output (default: {''})
+        float_format {str} -- Format string for floating point numbers. (default: {None})
+        columns {Union[Sequence[str], List[str]]} -- If given, only these columns will be written to the file (default: {None})
+        header {Union[bool, List[str]]} -- True to write the table's column names, False to write no header, or a list of alternative column labels (default: {True})
+        startrow {int} -- The zero-indexed row of the xlsx file to begin writing data (default: {0})
+        startcol {int} -- The zero-indexed column of the xlsx file to begin writing data (default: {0})
+        inf_rep {str} -- How the value of infinity will be represnted in the output (default: {'inf'})
+        verbose {bool} -- Log how long each phase of the export took at INFO level (default: {True})
+        freeze_panes {Tuple[int,int]} -- Specifies the one-based bottommost row and rightmost column that is to be frozen. (default: {None})
+        excel_date_format {str} -- Format string for dates written into Excel files  (default: {"yyyy-mm-dd"})
+        excel_datetime_format {str} -- Format string for datetime objects written into Excel files (default: {"yyyy-mm-dd  hh:mm:ss"})
+        font {str} -- As for to_autosize_excel (default: {None})
+        fontsize {float} -- The font size of the cells, in points (default: {11})
+        east_asian_width {bool} -- As for to_autosize_excel (default: {False})
+        multiline {bool} -- As for to_autosize_excel (default: {False})
+        stats {ExportStats} -- If given, the time taken by each phase of the export is recorded in this (default: {None})
+        max_width {float} -- If given, no column is sized wider than this many characters.  Arrow columns are measured by kernels over the whole column, so they are measured in full. (default: {None})
+        min_width {float} -- If given, no column is sized narrower than this many characters (default: {None})
+
+    Returns:
+        Union[Path, BinaryIO] -- A Path object representing the successfully written xlsx output, or outfile itself if it is file-like
+    """
+    stats = stats or ExportStats()
+    render_options = dict(excel_datetime_format=excel_datetime_format, excel_date_format=excel_date_format, na_rep=na_rep, float_format=float_format,
+                          inf_rep=inf_rep, font=font, fontsize=fontsize, east_asian_width=east_asian_width, multiline=multiline)
+
+    with stats.phase("labels"):
+        table = table.select(list(columns)) if columns else table
+        labels = list(header) if not isinstance(header, bool) else table.column_names
+        if len(labels) != table.num_columns:
+            raise ValueError("The number of labels must equal the number of columns in the table")
+
+    with stats.phase("widths"):
+        widths = []
+        for name, column, label in zip(table.column_names, table.columns, labels):
+            start = perf_counter()
+            width = arrow_column_width(column, **render_options)
+            stats.column_seconds[name] = perf_counter() - start
+            if consider_headers and header is not False:
+                width = _widest([width, text_length(Series([label], dtype=object), font, fontsize, east_asian_width, multiline)])
+            widths.append(clamp_width(width, min_width, max_width))
+
+    target = _output_target(outfile)
+    #a workbook written to memory is assembled in memory too, rather than through temporary files
+    wb = Workbook(str(target) if isinstance(target, Path) else target, {} if isinstance(target, Path) else {"in_memory": True})
+    try:
+        ws = wb.add_worksheet(sheet_name)
+        formats = {datetime: wb.add_format({"num_format": excel_datetime_format}),
+                   date: wb.add_format({"num_format": excel_date_format})}
+        row = startrow
+        with stats.phase("to_excel"):
+            if header is not False:
+                #headers that weren't considered in sizing the columns are wrapped instead, as in to_autosize_excel
+                header_format = None if consider_headers else wb.add_format({"text_wrap":True, "bold":True, "align":"center", "valign":"vcenter", "border":1})
+                ws.write_row(row, startcol, labels, header_format)
+                row += 1
+            for batch in table.to_batches(ARROW_BATCH_ROWS):
+                frame = batch.to_pandas()
+                write_frame(ws, frame, frame, formats, False, False, None, row, startcol, na_rep, float_format, inf_rep)
+                if multiline:
+                    lines = row_line_counts(frame)
+                    for offset in np.flatnonzero(lines > 1):
+                        ws.set_row(row + offset, DEFAULT_ROW_HEIGHT * fontsize / 11 * lines[offset])
+                row += len(frame)
+        stats.rows += row - startrow
+        stats.cells += (row - startrow) * table.num_columns
+
+        #line breaks are only shown in cells that wrap their text
+        column_format = wb.add_format({"text_wrap":True}) if multiline else None
+        with stats.phase("set_column"):
+            for offset, width in enumerate(widths):
+                #a column of nothing but missing values has no width of its own
+                if not np.isnan(width):
+                    ws.set_column(startcol + offset, startcol + offset, excel_column_width(width, fontsize, font), column_format)
+
+        if freeze_panes:
+            ws.freeze_panes(*freeze_panes)
+    finally:
+        with stats.phase("close"):
+            wb.close()
+
+    if verbose:
+        logger.info("Wrote %s: %r", target, stats)
+    return target
+
+
+def arrow_column_width(column, excel_datetime_format: str = None, excel_date_format: str = None, na_rep: str = None, float_format: str = None, inf_rep: str = None,
+                       **render_options) -> float:
+    """Gets the maximum character width of an Arrow column, the same as column_character_width gets for the pandas column it converts to, but computed on the Arrow buffers.  Only text measured by font or display width, which needs every string as a Python string, is converted.
+
+    Arguments:
+        column {pyarrow.ChunkedArray} -- The column to measure
+
+    Keyword Arguments:
+        excel_datetime_format {str} -- As for column_character_width (default: {None})
+        excel_date_format {str} -- If given, date columns are sized by this number format, as they are written with it (default: {None})
+        na_rep {str} -- If given, null values are measured as this.  Otherwise they are not measured, as they are written as empty cells. (default: {None})
+        float_format {str} -- As for column_character_width (default: {None})
+        inf_rep {str} -- As for column_character_width (default: {None})
+        **render_options -- How text is measured, as for text_length
+
+    Returns:
+        float -- The length of the longest value of the column as a string, or NaN if the column has no values
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    missing_width = np.nan
+    if column.null_count and na_rep is not None:
+        missing_width = text_length(Series([na_rep], dtype=object), **render_options)
+    if column.null_count == len(column):
+        return missing_width
+
+    kind = column.type
+    if pa.types.is_dictionary(kind):
+        #only the values actually used matter, an unused long value in the dictionary shouldn't widen the column
+        values = pc.unique(column.drop_null()).dictionary_decode()
+        return _widest([arrow_column_width(pa.chunked_array([values]), excel_datetime_format, excel_date_format, None, float_format, inf_rep, **render_options),
+                        missing_width])
+    if pa.types.is_boolean(kind):
+        #"False" is longer than "True", so only need to know whether any value is False
+        width = len(str(False)) if not pc.all(column).as_py() else len(str(True))
+    elif pa.types.is_integer(kind):
+        #the longest integer is always the smallest or the largest
+        extremes = pc.min_max(column)
+        width = max(len(str(extremes["min"].as_py())), len(str(extremes["max"].as_py())))
+    elif pa.types.is_floating(kind):
+        width = _float_width(Series(column.drop_null().to_numpy()), float_format, inf_rep)
+    elif pa.types.is_timestamp(kind) and excel_datetime_format is not None:
+        width = excel_format_width(excel_datetime_format)
+    elif pa.types.is_date(kind) and excel_date_format is not None:
+        width = excel_format_width(excel_date_format)
+    else:
+        if not (pa.types.is_string(kind) or pa.types.is_large_string(kind)):
+            #dates, decimals and the like are measured as Arrow renders them as text, which is how pandas does too
+            column = pc.cast(column, pa.string())
+        if _measures_characters(**render_options):
+            width = text_length(Series(column.drop_null().to_numpy(zero_copy_only=False), dtype=object), **render_options)
+        else:
+            width = longest_arrow_string(column)
+    return _widest([width, missing_width])
@@ -0,0 +1,63 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from inspect import signature
+from os import PathLike, cpu_count
+from pathlib import Path
+from typing import BinaryIO, Union
+from weakref import WeakKeyDictionary
+
+from pandas import DataFrame
+
+from .dataframe_to_autosize_excel import _export_steps, _output_target, to_autosize_excel
+
+#the most exports run at once on an event loop when no semaphore is given
+DEFAULT_CONCURRENT_EXPORTS = cpu_count() or 1
+#the semaphore shared by exports that were given none, one per event loop as a semaphore may only be used on one
+_default_semaphores = WeakKeyDictionary()
+
+
+async def to_autosize_excel_async(df: DataFrame,
+                                  outfile: Union[PathLike, BinaryIO],
+                                  offload_executor: Executor=None,
+                                  semaphore: asyncio.Semaphore=None,
+                                  **options) -> Union[Path, BinaryIO]:
+    """Same as to_autosize_excel, but for use in a coroutine.  Each phase of the export (resolving labels, measuring widths, and writing the workbook) runs in an executor so the event loop is not blocked.  If the task is cancelled, the phase running at the time finishes in the executor but no later phase is started, so a cancelled export that had not started writing leaves outfile untouched.
+
+    Arguments:
+        df {DataFrame} -- The data to be output into an xlsx file, or a pyarrow Table or RecordBatch, or a polars DataFrame, as for to_autosize_excel.  Those are exported in a single phase, which always finishes once started.
+        outfile {Union[PathLike, BinaryIO]} -- A pathlike object representing the full path and filename of the output xlsx file, or a writable binary file-like object (e.g. BytesIO) to write it to
+
+    Keyword Arguments:
+        offload_executor {Executor} -- The executor the phases run in.  It must run them in threads of this process, e.g. a ThreadPoolExecutor.  If None, the event loop's default executor is used (default: {None})
+        semaphore {asyncio.Semaphore} -- Limits how many exports run at once, waiting for one to finish before another is started.  If None, a semaphore of DEFAULT_CONCURRENT_EXPORTS shared by every export on the event loop that was given none is used (default: {None})
+        **options -- Keyword arguments of to_autosize_excel.  n_jobs and executor still decide how widths are measured within the width phase.
+
+    Raises:
+        TypeError: Raised if an option is not an argument of to_autosize_excel
+
+    Returns:
+        Union[Path, BinaryIO] -- A Path object representing the successfully written xlsx output, or outfile itself if it is file-like
+    """
+    #checks the options as a call to to_autosize_excel would, before waiting on the semaphore
+    arguments = signature(to_autosize_excel).bind(df, outfile, **options)
+    arguments.apply_defaults()
+    kwargs = dict(arguments.arguments)
+    consider_headers = kwargs.pop("consider_headers")
+    del kwargs["df"], kwargs["outfile"]
+
+    loop = asyncio.get_running_loop()
+    if semaphore is None:
+        semaphore = _default_semaphores.setdefault(loop, asyncio.Semaphore(DEFAULT_CONCURRENT_EXPORTS))
+
+    async with semaphore:
+        #Arrow data is written by to_autosize_excel_arrow, which has no phases to stop between, so it runs as one
+        from .arrow import as_arrow_table
+        if as_arrow_table(df) is not None:
+            return await loop.run_in_executor(offload_executor, partial(to_autosize_excel, df, outfile, **options))
+        steps = _export_steps(df, outfile, consider_headers, kwargs)
+        #cancellation is raised here, between phases.  The steps are then never resumed, so nothing after the running phase is done.
+        while await loop.run_in_executor(offload_executor, next, steps, None) is not None:
+            pass
+
+    return _output_target(outfile)
@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from typing import Hashable, NamedTuple, Optional, Union
+
+from pandas import Series, StringDtype
+from pandas.api.types import is_object_dtype
+from pandas.util import hash_pandas_object
+
+from .widths import _is_arrow_string, _measures_characters, sample_size_for
+
+
+class CacheInfo(NamedTuple):
+    """How well a WidthCache has done
+
+    Attributes:
+        hits {int} -- Columns whose width was found in the cache
+        misses {int} -- Columns whose width had to be computed
+        maxsize {int} -- The most widths the cache holds
+        currsize {int} -- The widths the cache holds now
+    """
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class WidthCache:
+    """A bounded cache of column widths keyed by the content of the column, so the same data exported again (under any column label, in any frame) is not measured again.  Only columns that cost more to measure than to key are cached (see column_key): text measured with font, east_asian_width or multiline, and not sampled.  Any other column is measured without the cache being consulted, so with the default options an export neither hits nor misses it.  The least recently used width is evicted when the cache is full.  Safe to share between threads.
+
+    Keyword Arguments:
+        maxsize {int} -- The most widths to hold (default: {1024})
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._widths = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable):
+        """Gets a cached width, counting a hit or a miss
+
+        Arguments:
+            key {Hashable} -- A key from column_key
+
+        Returns:
+            The cached width, or None if there is none
+        """
+        with self._lock:
+            if key in self._widths:
+                self._widths.move_to_end(key)
+                self.hits += 1
+                return self._widths[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, width):
+        """Caches a width, evicting the least recently used if the cache is full
+
+        Arguments:
+            key {Hashable} -- A key from column_key
+            width -- The width of the column
+        """
+        with self._lock:
+            self._widths[key] = width
+            self._widths.move_to_end(key)
+            while len(self._widths) > self.maxsize:
+                self._widths.popitem(last=False)
+
+    def cache_info(self) -> CacheInfo:
+        """Gets the hit and miss counts and size of the cache
+
+        Returns:
+            CacheInfo -- The cache's statistics
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._widths))
+
+    def clear(self):
+        """Empties the cache and resets its statistics"""
+        with self._lock:
+            self._widths.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def column_key(series: Series, **options) -> Optional[tuple]:
+    """Gets a cache key for the width of a column: a hash of its values and dtype together with every option that affects how it is measured.  Keying a column means reading every value of it, which costs as much as counting its characters, so only text measured character by character (by font, display width or line) is worth keying.
+
+    Arguments:
+        series {Series} -- The column to be measured
+        **options -- The options it will be measured with
+
+    Returns:
+        Optional[tuple] -- A hashable key that is equal for columns of equal content measured the same way, or None if the column is cheaper to measure than to key
+    """
+    if not _costly_to_measure(series, **options):
+        return None
+    digest = blake2b(digest_size=16)
+    if _is_arrow_string(series.dtype):
+        #the Arrow buffers are hashed as they are, without a value of them being read as a Python string
+        for chunk in series.array.__arrow_array__().chunks:
+            digest.update(f"{chunk.offset} {len(chunk)}".encode())
+            for buffer in chunk.buffers():
+                digest.update(b"" if buffer is None else buffer)
+    else:
+        #categorize would factorize the values before hashing them, which takes far longer than hashing text of mostly distinct values
+        digest.update(hash_pandas_object(series, index=False, categorize=False).to_numpy().tobytes())
+        #mixed values are hashed as strings, so None hashes as 'None' does, but only a missing value is measured as na_rep
+        digest.update(series.isna().to_numpy().tobytes())
+    return (str(series.dtype), len(series), digest.hexdigest(), tuple(sorted(options.items())))
+
+
+def _costly_to_measure(series: Series, width_sampling: Union[bool, int, None] = None, **options) -> bool:
+    #numbers, dates and categories are measured from statistics or by vectorized counting, and so are sampled columns, all cheaper than a hash of every value
+    if not (is_object_dtype(series.dtype) or isinstance(series.dtype, StringDtype) or _is_arrow_string(series.dtype)):
+        return False
+    return _measures_characters(**options) and not sample_size_for(len(series), width_sampling)
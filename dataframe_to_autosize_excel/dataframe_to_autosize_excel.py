@@ -1,13 +1,60 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import date, datetime
+from logging import getLogger
 from os import PathLike
 from os.path import expandvars
 from pathlib import Path
-from typing import Union, Sequence, List, Tuple
+from typing import BinaryIO, Dict, Iterator, Mapping, Union, Sequence, List, NamedTuple, Tuple
 
-from pandas import DataFrame, ExcelWriter
+import numpy as np
+from pandas import DataFrame, ExcelWriter, Series
+from pandas.api.types import is_object_dtype, is_string_dtype
+
+from .cache import WidthCache, column_key
+from .fonts import DEFAULT_MAX_DIGIT_WIDTH, font_metrics, line_counts
+from .metadata import metadata_properties, width_metadata
+from .native import native_layout_supported, write_frame
+from .stats import ExportStats
+from .widths import SampledWidth, clamp_width, frame_column_widths, text_length
+
+logger = getLogger(__name__)
+
+#the height in points of a row of Calibri 11, the default font of workbooks written by xlsxwriter
+DEFAULT_ROW_HEIGHT = 15
+
+#the options of to_autosize_excel that apply to a single sheet, and their defaults
+SHEET_OPTION_DEFAULTS = {"consider_headers": True,
+                         "na_rep": "",
+                         "float_format": None,
+                         "columns": None,
+                         "header": True,
+                         "index": True,
+                         "index_label": None,
+                         "startrow": 0,
+                         "startcol": 0,
+                         "inf_rep": "inf",
+                         "verbose": True,
+                         "freeze_panes": None,
+                         "width_sampling": None,
+                         "sampling_method": "random",
+                         "n_jobs": None,
+                         "executor": "thread",
+                         "font": None,
+                         "fontsize": 11,
+                         "east_asian_width": False,
+                         "multiline": False,
+                         "width_cache": None,
+                         "max_width": None,
+                         "min_width": None,
+                         "store_widths": False,
+                         "native_writer": False}
+#the options of to_autosize_excel that are passed on to estimate_character_widths
+WIDTH_OPTIONS = ("width_sampling", "sampling_method", "n_jobs", "executor", "font", "fontsize", "east_asian_width", "multiline", "width_cache",
+                 "max_width", "min_width")
 
 
 def to_autosize_excel(df: DataFrame,
-                      outfile: PathLike,
+                      outfile: Union[PathLike, BinaryIO],
                       consider_headers: bool = True,
                       sheet_name: str='Sheet1',
                       na_rep: str='',
@@ -23,12 +70,26 @@ def to_autosize_excel(df: DataFrame,
                       freeze_panes: Tuple[int,int]=None,
                       excel_date_format: str = "yyyy-mm-dd",
                       excel_datetime_format: str = "yyyy-mm-dd  hh:mm:ss",
-                      mode: str='w')-> Path:
+                      mode: str='w',
+                      width_sampling: Union[bool, int]=None,
+                      sampling_method: str='random',
+                      n_jobs: int=None,
+                      executor: Union[str, Executor]='thread',
+                      font: str=None,
+                      fontsize: float=11,
+                      east_asian_width: bool=False,
+                      multiline: bool=False,
+                      width_cache: WidthCache=None,
+                      store_widths: bool=False,
+                      stats: ExportStats=None,
+                      native_writer: bool=False,
+                      max_width: float=None,
+                      min_width: float=None)-> Union[Path, BinaryIO]:
     """
     
     Arguments:
-        df {DataFrame} -- The data to be output into an xlsx file
-        outfile {PathLike} -- A pathlike object representing the full path and filename of the output xlsx file
+        df {DataFrame} -- The data to be output into an xlsx file.  A pyarrow Table or RecordBatch, or a polars DataFrame, is also accepted and exported without converting it to a DataFrame (see to_autosize_excel_arrow), in which case index, index_label, mode and the options of width sampling, parallel measurement, caching and stored widths do not apply.
+        outfile {Union[PathLike, BinaryIO]} -- A pathlike object representing the full path and filename of the output xlsx file, or a writable binary file-like object (e.g. BytesIO) to write it to
     
     Keyword Arguments:
         consider_headers {bool} -- If true, consider the width of the column headers when sizing columns (default: {True})
@@ -42,79 +103,301 @@ def to_autosize_excel(df: DataFrame,
         startrow {int} -- The zero-indexed row of the xlsx file to begin writing data (default: {0})
         startcol {int} -- The zero-indexed column of the xlsx file to begin writing data (default: {0})
         inf_rep {str} -- How the value of infinity will be represnted in the output (default: {'inf'})
-        verbose {bool} -- Display more information in the error logs. (default: {True})
+        verbose {bool} -- Log how long each phase of the export took, and the probability that a width estimated from a sample is too narrow, at INFO level (default: {True})
         freeze_panes {Tuple[int,int]} -- Specifies the one-based bottommost row and rightmost column that is to be frozen. (default: {None})
         excel_date_format {str} -- Format string for dates written into Excel files  (default: {"yyyy-mm-dd"})
         excel_datetime_format {str} -- Format string for datetime objects written into Excel files (default: {"yyyy-mm-dd  hh:mm:ss"})
         mode {str} -- Must equal 'w' (write) or 'a' (append)  (default: {'w'})
+        width_sampling {Union[bool, int]} -- None to estimate widths from a sample of rows only for very long frames, True to always sample, False to always measure every row, or the number of rows to sample (default: {None})
+        sampling_method {str} -- How rows are sampled when estimating widths, 'random' or 'stratified' (default: {'random'})
+        n_jobs {int} -- The number of workers to measure columns with.  None or 1 measures serially, -1 uses one worker per CPU.  Small frames are always measured serially. (default: {None})
+        executor {Union[str, Executor]} -- 'thread' or 'process' to choose the kind of worker pool used when n_jobs is set, or an existing Executor to use.  Processes are sent a pickled copy of their columns, which can take longer than measuring them. (default: {'thread'})
+        font {str} -- If given, text is sized by the width of each character in this font rather than by counting characters.  Either a bundled font name or the path of a .ttf or .otf file.  Cells are written in Calibri unless the workbook says otherwise. (default: {None})
+        fontsize {float} -- The font size of the cells, in points (default: {11})
+        east_asian_width {bool} -- If true, text is sized by display width, so East Asian wide characters count as two characters and combining marks as none.  Ignored when a font is given. (default: {False})
+        multiline {bool} -- If true, text containing line breaks is wrapped, columns are sized to the longest line rather than the whole text, and rows are made tall enough for all their lines (default: {False})
+        width_cache {WidthCache} -- If given, columns already measured for an earlier export with the same content and options take their width from this cache.  Only text measured with font, east_asian_width or multiline is cached, as every other column is cheaper to measure than to look up. (default: {None})
+        store_widths {bool} -- If true, the width of each column and the options it was measured with are stored in the workbook's custom document properties, so append_autosize_excel can later add rows without measuring those already written (default: {False})
+        stats {ExportStats} -- If given, the time taken by each phase of the export and each column's measurement, and the number of rows and cells written, are recorded in this (default: {None})
+        native_writer {bool} -- If true, cells are written by driving xlsxwriter directly one column at a time rather than through df.to_excel, which is much faster for long frames.  The layout is the same, but frames with a MultiIndex (whose labels to_excel merges across cells) are always written by df.to_excel. (default: {False})
+        max_width {float} -- If given, no column is sized wider than this many characters (in widths of font's widest digit if font is given), however long its text.  A column stops being measured as soon as it reaches this width, so a column of a few very long cells costs a fraction of a full measurement. (default: {None})
+        min_width {float} -- If given, no column is sized narrower than this many characters, including columns of nothing but missing values (default: {None})
     
     Returns:
-        Path -- A Path object representing the successfully written xlsx output
+        Union[Path, BinaryIO] -- A Path object representing the successfully written xlsx output, or outfile itself if it is file-like
     """
     #we don't want to pass df or outfile as kwargs later
     kwargs = {k:v for k,v in zip(list(locals().keys())[3:], list(locals().values())[3:])}
 
-    #construct the ExcelWriter, removing its kwargs as they will no longer be needed
-    writer = ExcelWriter(str(Path(expandvars(outfile))),
-                         engine="xlsxwriter",
-                         date_format=kwargs.pop("excel_date_format"),
-                         datetime_format=kwargs.pop("excel_datetime_format"),
-                         mode=kwargs.pop("mode"))
+    #Arrow data has no index, and is measured and written without ever becoming a DataFrame
+    from .arrow import as_arrow_table, to_autosize_excel_arrow
+    table = as_arrow_table(df)
+    if table is not None:
+        return to_autosize_excel_arrow(table, outfile, consider_headers, sheet_name, na_rep, float_format, columns, header, startrow, startcol,
+                                       inf_rep, verbose, freeze_panes, excel_date_format, excel_datetime_format,
+                                       font, fontsize, east_asian_width, multiline, stats, max_width, min_width)
 
-    #This just makes things easier later, trust me.  Also df is probably mutable, so not even risking screwing it up!
-    if kwargs["columns"]:
-        data = df[list(kwargs["columns"])]
-    else:
-        data = df
+    for _ in _export_steps(df, outfile, consider_headers, kwargs):
+        pass
+
+    return _output_target(outfile)
 
-    with writer:
+def _output_target(outfile: Union[PathLike, BinaryIO]) -> Union[Path, BinaryIO]:
+    """Gets what an xlsx file is written to: a file-like object as it is, anything else as a path
+
+    Arguments:
+        outfile {Union[PathLike, BinaryIO]} -- A path, which may contain environment variables, or a writable binary file-like object
+
+    Returns:
+        Union[Path, BinaryIO] -- The path with environment variables expanded, or the file-like object
+    """
+    return outfile if hasattr(outfile, "write") else Path(expandvars(outfile))
+
+def _writer_kwargs(target: Union[Path, BinaryIO]) -> dict:
+    #a workbook written to memory is assembled in memory too, rather than through temporary files
+    return {} if isinstance(target, Path) else {"engine_kwargs": {"options": {"in_memory": True}}}
+
+def _export_steps(df: DataFrame, outfile: Union[PathLike, BinaryIO], consider_headers: bool, kwargs: dict) -> Iterator[str]:
+    #the phases of to_autosize_excel, yielding the name of each as it finishes so to_autosize_excel_async can stop between them.
+    #kwargs are the remaining arguments of to_autosize_excel, and are consumed.
+    target = _output_target(outfile)
+    #removing the ExcelWriter's kwargs as they are not kwargs of df.to_excel
+    date_format = kwargs.pop("excel_date_format")
+    datetime_format = kwargs.pop("excel_datetime_format")
+    mode = kwargs.pop("mode")
+
+    #these are only meaningful to this function, df.to_excel does not accept them
+    verbose = kwargs.pop("verbose")
+    stats = kwargs.pop("stats") or ExportStats()
+    native_writer = kwargs.pop("native_writer")
+    width_options = {option:kwargs.pop(option) for option in WIDTH_OPTIONS}
+    width_options.update(excel_datetime_format=datetime_format, na_rep=kwargs["na_rep"], float_format=kwargs["float_format"], inf_rep=kwargs["inf_rep"])
+    stored_options = dict(width_options, excel_date_format=date_format) if kwargs.pop("store_widths") else None
+
+    #everything below works from this one view of the data, so the frame is only ever copied once
+    with stats.phase("labels"):
+        view = export_view(df, kwargs["columns"], kwargs["header"], kwargs["index"], kwargs["index_label"])
+    yield "labels"
+
+    with stats.phase("widths"):
+        widths = _sheet_widths(view, consider_headers, verbose, column_seconds=stats.column_seconds, **width_options)
+    yield "widths"
+
+    #the ExcelWriter truncates outfile as soon as it is constructed, so stopping before this phase leaves any existing file untouched
+    writer = ExcelWriter(target, engine="xlsxwriter", date_format=date_format, datetime_format=datetime_format, mode=mode, **_writer_kwargs(target))
+    try:
         #only kwargs left should be kwargs of df.to_excel
-        df.to_excel(writer, **kwargs)
-        wb = writer.book
-        ws = writer.sheets[kwargs["sheet_name"]]
-
-        if isinstance(columns, bool): #Use the DataFrame's existing labels
-            '''if also going to write index, mash it into the dataframe and just get the
-            index level names as columns'''
-            if index:
-                labels = data.reset_index().columns.to_list()
-            else:
-                labels = data.columns.to_list()
-        else: #Use provided alternative labels
-            if index and index_label: #Use provided index label(s)
-                if isinstance(index_label, str):
-                    labels = [index_label] + list(columns)
-                else:
-                    labels = list(index_label) + list(columns)
-            elif index and not index_label: #Use existing index name(s) as label(s) with alternative column labels
-                #a labeless index has a Nonetype name, which converts to the string "None".  I prefer the empty string.
-                labels = [str(name) if name else "" for name in data.index.names] + list(columns)
-            else:
-                labels = list(columns)
-
-        if index: #much easier to get widths if you just treat the index like regular columns
-            widths = maximum_character_widths(data.reset_index(), consider_headers, labels)
+        _write_autosized_sheet(writer, df, view, widths, consider_headers,
+                               width_options["font"], width_options["fontsize"], width_options["multiline"], stored_options, stats, native_writer, **kwargs)
+    finally:
+        with stats.phase("close"):
+            writer.close()
+
+    if verbose:
+        logger.info("Wrote %s: %r", target, stats)
+    yield "close"
+
+def to_autosize_excel_sheets(sheets: Mapping[str, DataFrame],
+                             outfile: Union[PathLike, BinaryIO],
+                             sheet_options: Mapping[str, dict]=None,
+                             max_workers: int=None,
+                             excel_date_format: str = "yyyy-mm-dd",
+                             excel_datetime_format: str = "yyyy-mm-dd  hh:mm:ss",
+                             **options) -> Union[Path, BinaryIO]:
+    """Outputs several DataFrames into one xlsx file, one sheet each, with autofitted columns.  The workbook is opened once, and the column widths of all sheets are computed concurrently before any sheet is written.
+
+    Arguments:
+        sheets {Mapping[str, DataFrame]} -- The data to be output, by sheet name, in the order the sheets should appear
+        outfile {Union[PathLike, BinaryIO]} -- A pathlike object representing the full path and filename of the output xlsx file, or a writable binary file-like object (e.g. BytesIO) to write it to
+
+    Keyword Arguments:
+        sheet_options {Mapping[str, dict]} -- Keyword arguments of to_autosize_excel for individual sheets, by sheet name.  These override options. (default: {None})
+        max_workers {int} -- The most sheets to compute widths for at once.  If None, the default of ThreadPoolExecutor is used (default: {None})
+        excel_date_format {str} -- Format string for dates written into Excel files  (default: {"yyyy-mm-dd"})
+        excel_datetime_format {str} -- Format string for datetime objects written into Excel files (default: {"yyyy-mm-dd  hh:mm:ss"})
+        **options -- Keyword arguments of to_autosize_excel applied to every sheet, e.g. index=False.  sheet_name, outfile and mode are not accepted.
+
+    Raises:
+        TypeError: Raised if an option is not one that to_autosize_excel applies to a single sheet, or a sheet is pyarrow or polars data rather than a DataFrame
+
+    Returns:
+        Union[Path, BinaryIO] -- A Path object representing the successfully written xlsx output, or outfile itself if it is file-like
+    """
+    #the sheets share one workbook written through pandas, which Arrow data is never converted into
+    from .arrow import as_arrow_table
+    arrow_sheets = [sheet_name for sheet_name, df in sheets.items() if as_arrow_table(df) is not None]
+    if arrow_sheets:
+        raise TypeError(f"Sheets must be DataFrames, convert pyarrow and polars data of sheets {', '.join(map(str, arrow_sheets))} with to_pandas() first")
+
+    sheet_options = sheet_options or {}
+    resolved = {}
+    for sheet_name in sheets:
+        sheet_kwargs = {**SHEET_OPTION_DEFAULTS, **options, **sheet_options.get(sheet_name, {})}
+        unknown = set(sheet_kwargs) - set(SHEET_OPTION_DEFAULTS)
+        if unknown:
+            raise TypeError(f"Unknown sheet options: {', '.join(sorted(unknown))}")
+        resolved[sheet_name] = sheet_kwargs
+
+    def sheet_widths(sheet_name):
+        kwargs = resolved[sheet_name]
+        view = export_view(sheets[sheet_name], kwargs["columns"], kwargs["header"], kwargs["index"], kwargs["index_label"])
+        width_options = {option:kwargs[option] for option in WIDTH_OPTIONS}
+        width_options.update(excel_datetime_format=excel_datetime_format,
+                             na_rep=kwargs["na_rep"],
+                             float_format=kwargs["float_format"],
+                             inf_rep=kwargs["inf_rep"])
+        stored_options = dict(width_options, excel_date_format=excel_date_format) if kwargs["store_widths"] else None
+        return view, _sheet_widths(view, kwargs["consider_headers"], kwargs["verbose"], **width_options), stored_options
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        sized = dict(zip(sheets, pool.map(sheet_widths, sheets)))
+
+    target = _output_target(outfile)
+    with ExcelWriter(target, engine="xlsxwriter", date_format=excel_date_format, datetime_format=excel_datetime_format, **_writer_kwargs(target)) as writer:
+        for sheet_name, df in sheets.items():
+            kwargs = dict(resolved[sheet_name])
+            consider_headers = kwargs.pop("consider_headers")
+            for option in ("verbose", "store_widths", "native_writer") + WIDTH_OPTIONS:
+                kwargs.pop(option)
+            view, widths, stored_options = sized[sheet_name]
+            _write_autosized_sheet(writer, df, view, widths, consider_headers,
+                                   resolved[sheet_name]["font"], resolved[sheet_name]["fontsize"], resolved[sheet_name]["multiline"],
+                                   stored_options, native_writer=resolved[sheet_name]["native_writer"], sheet_name=sheet_name, **kwargs)
+
+    return target
+
+def _sheet_widths(view: "ExportView", consider_headers: bool, verbose: bool, **width_options) -> dict:
+    estimates = estimate_character_widths(view.data, consider_headers, view.labels, **width_options)
+    if verbose:
+        for column_name, estimate in estimates.items():
+            if estimate.miss_probability:
+                logger.info("Width of column %s estimated from a sample as %s characters, probability of a wider row up to %.2g",
+                            column_name, estimate.width, estimate.miss_probability)
+    return {k:v.width for k,v in estimates.items()}
+
+def _write_autosized_sheet(writer: ExcelWriter, df: DataFrame, view: "ExportView", widths: dict, consider_headers: bool,
+                           font: str, fontsize: float, multiline: bool, stored_options: dict=None, stats: ExportStats=None, native_writer: bool=False, **kwargs):
+    stats = stats or ExportStats()
+    wb = writer.book
+    #kwargs are those of df.to_excel
+    with stats.phase("to_excel"):
+        if native_writer and native_layout_supported(df, kwargs["index"]):
+            ws = wb.get_worksheet_by_name(kwargs["sheet_name"]) or wb.add_worksheet(kwargs["sheet_name"])
+            formats = {datetime: wb.add_format({"num_format": writer.datetime_format}),
+                       date: wb.add_format({"num_format": writer.date_format})}
+            write_frame(ws, df, view.data, formats, kwargs["header"], kwargs["index"], kwargs["index_label"],
+                        kwargs["startrow"], kwargs["startcol"], kwargs["na_rep"], kwargs["float_format"], kwargs["inf_rep"])
+            if kwargs["freeze_panes"]:
+                ws.freeze_panes(*kwargs["freeze_panes"])
         else:
-            widths = maximum_character_widths(data, consider_headers, labels)
-
-        #size columns using calculated best-fit widths
-        for column in range(startcol, startcol+len(labels)):
-            if index:
-                column_name = data.reset_index().columns[column]
-            else:
-                column_name = data.columns[column]
-            column_width = widths[column_name]
-            ws.set_column(column, column, excel_column_width(column_width))
-
-        #re-write the columns with a custom format that wraps text if columns headers were not considered in sizing of columns
-        if columns and not consider_headers:
+            df.to_excel(writer, **kwargs)
+    ws = writer.sheets[kwargs["sheet_name"]]
+    header_rows = 1 if kwargs["header"] is not False else 0
+    stats.rows += len(view.data) + header_rows
+    stats.cells += (len(view.data) + header_rows) * len(view.data.columns)
+
+    #line breaks are only shown in cells that wrap their text
+    column_format = wb.add_format({"text_wrap":True}) if multiline else None
+
+    #size columns using calculated best-fit widths
+    with stats.phase("set_column"):
+        for offset, column_name in enumerate(view.data.columns):
+            column = kwargs["startcol"] + offset
+            ws.set_column(column, column, excel_column_width(widths[column_name], fontsize, font), column_format)
+
+    if multiline:
+        with stats.phase("set_row"):
+            first_row = kwargs["startrow"] + header_rows
+            row_height = DEFAULT_ROW_HEIGHT * fontsize / 11
+            lines = row_line_counts(view.data)
+            for row in np.flatnonzero(lines > 1):
+                ws.set_row(first_row + row, row_height * lines[row])
+
+    #re-write the columns with a custom format that wraps text if columns headers were not considered in sizing of columns
+    if kwargs["header"] and not consider_headers:
+        with stats.phase("header"):
             f = wb.add_format({"text_wrap":True, "bold":True, "align":"center", "valign":"vcenter", "border":1})
-            ws.write_row(startrow, startcol, labels, f)
+            ws.write_row(kwargs["startrow"], kwargs["startcol"], view.labels, f)
 
+    #everything append_autosize_excel needs to add rows to this sheet later without reading back those already written
+    if stored_options is not None:
+        metadata = width_metadata([widths[column_name] for column_name in view.data.columns], len(view.data),
+                                  kwargs["startrow"], kwargs["startcol"], kwargs["header"] is not False, **stored_options)
+        for name, value in metadata_properties(kwargs["sheet_name"], metadata).items():
+            wb.set_custom_property(name, value)
 
-    return Path(writer.path)
+class ExportView(NamedTuple):
+    """The data exactly as it will be laid out in the worksheet, computed once per export
 
-def maximum_character_widths(df: DataFrame, consider_headers: bool = True, alternate_headers: Union[list,dict] = None) -> dict:
+    Attributes:
+        data {DataFrame} -- The exported columns in output order, with the index (if written) as leading regular columns
+        labels {List[str]} -- The header written above each column of data, in the same order
+    """
+    data: DataFrame
+    labels: List[str]
+
+
+def export_view(df: DataFrame,
+                columns: Union[Sequence[str], List[str]]=None,
+                header: Union[bool, List[str]]=True,
+                index: bool=True,
+                index_label: Union[str, Sequence]=None) -> ExportView:
+    """Resolves the columns and header labels of an export, in the order they will be written
+
+    Arguments:
+        df {DataFrame} -- The data to be output
+
+    Keyword Arguments:
+        columns {Union[Sequence[str], List[str]]} -- If given, only these columns will be written (default: {None})
+        header {Union[bool, List[str]]} -- True to use the DataFrame's labels or a list of alternative column labels (default: {True})
+        index {bool} -- If true, the index is written as the leading columns (default: {True})
+        index_label {Union[str, Sequence]} -- Alternative column headers for index columns. (default: {None})
+
+    Returns:
+        ExportView -- The data and labels of the export
+    """
+    data = df[list(columns)] if columns else df
+
+    if isinstance(header, bool): #Use the DataFrame's existing labels
+        column_labels = data.columns.to_list()
+    else: #Use provided alternative labels
+        column_labels = list(header)
+
+    if index:
+        nlevels = data.index.nlevels
+        #much easier to get widths if you just treat the index like regular columns
+        data = data.reset_index()
+        if index_label: #Use provided index label(s)
+            index_labels = [index_label] if isinstance(index_label, str) else list(index_label)
+        elif isinstance(header, bool):
+            #the index was mashed into the dataframe, so the names reset_index gave its levels are the leading columns
+            index_labels = data.columns[:nlevels].to_list()
+        else:
+            #a labeless index has a Nonetype name, which converts to the string "None".  I prefer the empty string.
+            index_labels = [str(name) if name else "" for name in df.index.names]
+    else:
+        index_labels = []
+
+    return ExportView(data, [str(label) for label in index_labels + column_labels])
+
+def maximum_character_widths(df: DataFrame,
+                             consider_headers: bool = True,
+                             alternate_headers: Union[list,dict] = None,
+                             width_sampling: Union[bool, int] = None,
+                             sampling_method: str = "random",
+                             n_jobs: int = None,
+                             executor: Union[str, Executor] = "thread",
+                             excel_datetime_format: str = None,
+                             na_rep: str = None,
+                             float_format: str = None,
+                             inf_rep: str = None,
+                             font: str = None,
+                             fontsize: float = 11,
+                             east_asian_width: bool = False,
+                             multiline: bool = False,
+                             width_cache: WidthCache = None,
+                             max_width: float = None,
+                             min_width: float = None) -> dict:
     """Gets the maximum character width (i.e. the length of the string) of a column in a dataframe.  Optionally considers the headers when determining the maximum width
     
     Arguments:
@@ -123,14 +406,85 @@ def maximum_character_widths(df: DataFrame, consider_headers: bool = True, alter
     Keyword Arguments:
         consider_headers {bool} --  If true, consider the column header when determining maximum width. (default: {True})
         alternate_headers {Union[list,dict]} -- If present, is equivalent to consider_headers = True, except these values will be considered instead of column labels. (default: {None})
+        width_sampling {Union[bool, int]} -- None to estimate widths from a sample of rows only for very long frames, True to always sample, False to always measure every row, or the number of rows to sample (default: {None})
+        sampling_method {str} -- How rows are sampled when estimating widths, 'random' or 'stratified' (default: {'random'})
+        n_jobs {int} -- The number of workers to measure columns with.  None or 1 measures serially, -1 uses one worker per CPU.  Small frames are always measured serially. (default: {None})
+        executor {Union[str, Executor]} -- 'thread' or 'process' to choose the kind of worker pool used when n_jobs is set, or an existing Executor to use.  Processes are sent a pickled copy of their columns, which can take longer than measuring them. (default: {'thread'})
+        excel_datetime_format {str} -- If given, datetime columns are sized by how wide this Excel number format displays them instead of by str(value) (default: {None})
+        na_rep {str} -- If given, null values are measured as this rather than as their string representation (default: {None})
+        float_format {str} -- If given, floating point numbers are measured after rounding by this format string, as they are when written (default: {None})
+        inf_rep {str} -- If given, infinity is measured as this rather than as "inf" (default: {None})
+        font {str} -- If given, text (including headers) is measured in widths of this font's widest digit, by the width of each of its characters, rather than by counting characters.  Either a bundled font name or the path of a .ttf or .otf file. (default: {None})
+        fontsize {float} -- The font size of the cells, in points (default: {11})
+        east_asian_width {bool} -- If true, text (including headers) is measured by display width, so East Asian wide characters count as two characters and combining marks as none.  Ignored when a font is given. (default: {False})
+        multiline {bool} -- If true, only the longest line of text containing line breaks is measured (default: {False})
+        width_cache {WidthCache} -- If given, columns whose content and options match a previously measured column take its width from this cache instead of being measured again.  Only text measured with font, east_asian_width or multiline is cached, as every other column is cheaper to measure than to look up. (default: {None})
+        max_width {float} -- If given, widths are at most this, and a column is measured only until it is this wide (default: {None})
+        min_width {float} -- If given, widths are at least this, including those of columns with no width of their own (default: {None})
     
     Raises:
-        ValueError: Raised if the number of alternative column headers does not match the number of columns in the dataframe
+        ValueError: Raised if the number of alternative column headers does not match the number of columns in the dataframe, or min_width is greater than max_width
         TypeError: Raised if alternative headers is not a list or dictionary
     
     Returns:
         dict -- A dictionary of character widths by column header
     """
+    estimates = estimate_character_widths(df, consider_headers, alternate_headers, width_sampling, sampling_method, n_jobs, executor,
+                                          excel_datetime_format, na_rep, float_format, inf_rep, font, fontsize, east_asian_width, multiline, width_cache,
+                                          max_width, min_width)
+    return {k:v.width for k,v in estimates.items()}
+
+def estimate_character_widths(df: DataFrame,
+                              consider_headers: bool = True,
+                              alternate_headers: Union[list,dict] = None,
+                              width_sampling: Union[bool, int] = None,
+                              sampling_method: str = "random",
+                              n_jobs: int = None,
+                              executor: Union[str, Executor] = "thread",
+                              excel_datetime_format: str = None,
+                              na_rep: str = None,
+                              float_format: str = None,
+                              inf_rep: str = None,
+                              font: str = None,
+                              fontsize: float = 11,
+                              east_asian_width: bool = False,
+                              multiline: bool = False,
+                              width_cache: WidthCache = None,
+                              max_width: float = None,
+                              min_width: float = None,
+                              column_seconds: Dict[str, float] = None) -> Dict[str, SampledWidth]:
+    """Same as maximum_character_widths, but also reports how likely each width is to be too narrow when it was estimated from a sample of rows
+    
+    Arguments:
+        df {DataFrame} -- The input data
+    
+    Keyword Arguments:
+        consider_headers {bool} --  If true, consider the column header when determining maximum width. (default: {True})
+        alternate_headers {Union[list,dict]} -- If present, is equivalent to consider_headers = True, except these values will be considered instead of column labels. (default: {None})
+        width_sampling {Union[bool, int]} -- None to estimate widths from a sample of rows only for very long frames, True to always sample, False to always measure every row, or the number of rows to sample (default: {None})
+        sampling_method {str} -- How rows are sampled when estimating widths, 'random' or 'stratified' (default: {'random'})
+        n_jobs {int} -- The number of workers to measure columns with.  None or 1 measures serially, -1 uses one worker per CPU.  Small frames are always measured serially. (default: {None})
+        executor {Union[str, Executor]} -- 'thread' or 'process' to choose the kind of worker pool used when n_jobs is set, or an existing Executor to use.  Processes are sent a pickled copy of their columns, which can take longer than measuring them. (default: {'thread'})
+        excel_datetime_format {str} -- If given, datetime columns are sized by how wide this Excel number format displays them instead of by str(value) (default: {None})
+        na_rep {str} -- If given, null values are measured as this rather than as their string representation (default: {None})
+        float_format {str} -- If given, floating point numbers are measured after rounding by this format string, as they are when written (default: {None})
+        inf_rep {str} -- If given, infinity is measured as this rather than as "inf" (default: {None})
+        font {str} -- If given, text (including headers) is measured in widths of this font's widest digit, by the width of each of its characters, rather than by counting characters.  Either a bundled font name or the path of a .ttf or .otf file. (default: {None})
+        fontsize {float} -- The font size of the cells, in points (default: {11})
+        east_asian_width {bool} -- If true, text (including headers) is measured by display width, so East Asian wide characters count as two characters and combining marks as none.  Ignored when a font is given. (default: {False})
+        multiline {bool} -- If true, only the longest line of text containing line breaks is measured (default: {False})
+        width_cache {WidthCache} -- If given, columns whose content and options match a previously measured column take its width from this cache instead of being measured again.  Only text measured with font, east_asian_width or multiline is cached, as every other column is cheaper to measure than to look up. (default: {None})
+        max_width {float} -- If given, widths are at most this, and a column is measured only until it is this wide (default: {None})
+        min_width {float} -- If given, widths are at least this, including those of columns with no width of their own (default: {None})
+        column_seconds {Dict[str, float]} -- If given, the time in seconds spent measuring each column that was not found in width_cache is added to this, by column label (default: {None})
+    
+    Raises:
+        ValueError: Raised if the number of alternative column headers does not match the number of columns in the dataframe, or min_width is greater than max_width
+        TypeError: Raised if alternative headers is not a list or dictionary
+    
+    Returns:
+        Dict[str, SampledWidth] -- A dictionary of estimated character widths by column header
+    """
     widths = {}
 
     if isinstance(alternate_headers, list):
@@ -148,15 +502,70 @@ def maximum_character_widths(df: DataFrame, consider_headers: bool = True, alter
     else:
         raise TypeError("Alternative headers must be a list or dictionary")
 
+    measure_options = dict(width_sampling=width_sampling,
+                           sampling_method=sampling_method,
+                           excel_datetime_format=excel_datetime_format,
+                           na_rep=na_rep,
+                           float_format=float_format,
+                           inf_rep=inf_rep,
+                           font=font,
+                           fontsize=fontsize,
+                           east_asian_width=east_asian_width,
+                           multiline=multiline,
+                           max_width=max_width)
+
+    estimates = {}
+    cache_keys = {}
+    if width_cache is not None:
+        for key in headers:
+            try:
+                cache_key = column_key(df[key], **measure_options)
+            except TypeError: #values that can't be hashed, e.g. lists, are just measured every time
+                continue
+            #so are columns that are cheaper to measure than to key
+            if cache_key is None:
+                continue
+            cache_keys[key] = cache_key
+            cached = width_cache.get(cache_keys[key])
+            if cached is not None:
+                estimates[key] = cached
+
+    unmeasured = [key for key in headers if key not in estimates]
+    if unmeasured:
+        estimates.update(frame_column_widths(df[unmeasured], n_jobs, executor, column_seconds, **measure_options))
+        for key in unmeasured:
+            if key in cache_keys:
+                width_cache.put(cache_keys[key], estimates[key])
     for key,value in headers.items():
+        estimate = estimates[key]
         if consider_headers:
-            widths[key] = max(len(value), df[key].astype(str).str.len().max())
-        else:
-            widths[key] = df[key].astype(str).str.len().max()
+            header_width = text_length(Series([value], dtype=object), font, fontsize, east_asian_width, multiline)
+            estimate = estimate._replace(width=max(header_width, estimate.width))
+        if max_width is not None and estimate.width >= max_width:
+            #no row can be shown any wider, so a sample can't have missed a wider one
+            estimate = SampledWidth(max_width, 0.0)
+        widths[key] = estimate._replace(width=clamp_width(estimate.width, min_width, max_width))
 
     return widths
 
-def excel_column_width(charwidth:int, fontsize:float=11) -> float:
+def row_line_counts(df: DataFrame) -> np.ndarray:
+    """Gets the number of lines in the tallest cell of each row, counting the line breaks in text columns
+
+    Arguments:
+        df {DataFrame} -- The input data
+
+    Returns:
+        np.ndarray -- The number of lines of each row, at least 1
+    """
+    lines = np.ones(len(df), dtype=np.int64)
+    for key in df.columns:
+        column = df[key]
+        #only text can contain line breaks
+        if is_object_dtype(column.dtype) or is_string_dtype(column.dtype):
+            lines = np.maximum(lines, line_counts(column.fillna("").astype(str)))
+    return lines
+
+def excel_column_width(charwidth:int, fontsize:float=11, font:str=None) -> float:
     """Converts a character width to a an Excel column width based on the font size
     
     Arguments:
@@ -164,9 +573,14 @@ def excel_column_width(charwidth:int, fontsize:float=11) -> float:
     
     Keyword Arguments:
         fontsize {float} --  The font size of the cell to fit. (default: {11})
+        font {str} -- If given, charwidth is in widths of this font's widest digit (as measured with a font by maximum_character_widths) and is converted exactly (default: {None})
     
     Returns:
         float -- The value of a close-enough Excel column width
     """
+    if font is not None:
+        #column widths count digits of the workbook's default font, so it's only a matter of how much wider this font's digits are
+        return charwidth * font_metrics(font, fontsize).max_digit_width / DEFAULT_MAX_DIGIT_WIDTH
+
     #emperically derived from observation of excel.  At best this is an approximation that errs on the side of slightly oversized
     return charwidth * round(0.118775 * fontsize, 2) 
\ No newline at end of file
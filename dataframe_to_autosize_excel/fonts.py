@@ -0,0 +1,375 @@
+import struct
+import unicodedata
+from functools import lru_cache
+from hashlib import sha256
+from os import environ, getpid
+from pathlib import Path
+from typing import NamedTuple, Sequence, Union
+
+import numpy as np
+
+#pixels per point on a 96 dpi screen, which is what Excel lays columns out for
+PIXELS_PER_POINT = 96 / 72
+#the widest digit of the workbook's default font (Calibri 11) in pixels.  Excel column widths are counted in these.
+DEFAULT_MAX_DIGIT_WIDTH = 7
+#code points below this are looked up in a font's table, anything above takes its fallback width
+TABLE_SIZE = 0x10000
+#metrics derived from font files are kept here so later processes don't have to parse the font again
+FONT_CACHE_DIR = Path(environ.get("DATAFRAME_TO_AUTOSIZE_EXCEL_CACHE", Path.home() / ".cache" / "dataframe_to_autosize_excel"))
+#file extensions of the font files font_metrics can read
+FONT_FILE_SUFFIXES = (".ttf", ".otf")
+_LINE_BREAK = ord("\n")
+_CARRIAGE_RETURN = ord("\r")
+#the most code points, including those padding shorter strings, held in memory at once
+_CODE_POINTS_PER_BLOCK = 1 << 20
+#characters that join or modify the character before them rather than taking up room of their own.  Emoji skin tone modifiers are wide by themselves, but never shown by themselves.
+_ZERO_WIDTH = frozenset(chr(c) for c in range(0x1F3FB, 0x1F400))
+
+#advance widths of the printable ASCII characters (space to ~), in font units per em
+_CALIBRI_ASCII = [463, 544, 821, 1038, 1038, 1463, 1397, 452, 621, 621, 1038, 1038, 511, 627, 517, 791,
+                  1038, 1038, 1038, 1038, 1038, 1038, 1038, 1038, 1038, 1038, 548, 548, 1038, 1038, 1038, 940,
+                  1823, 1185, 1114, 1092, 1260, 1000, 941, 1292, 1276, 516, 653, 1064, 861, 1751, 1322, 1356,
+                  1058, 1378, 1112, 941, 998, 1314, 1162, 1822, 1063, 998, 959, 628, 791, 628, 1038, 1021,
+                  586, 981, 1076, 866, 1076, 1019, 625, 964, 1076, 470, 490, 931, 470, 1636, 1076, 1080,
+                  1076, 1076, 714, 801, 686, 1076, 925, 1464, 887, 927, 809, 710, 940, 710, 1038]
+
+
+class FontTable(NamedTuple):
+    """Advance widths of a font's characters, independent of its size
+
+    Attributes:
+        units_per_em {int} -- The font units in one em (the font size)
+        advances {dict} -- Advance width in font units by code point
+        fallback {int} -- Advance width in font units of any character missing from advances
+    """
+    units_per_em: int
+    advances: dict
+    fallback: int
+
+
+class FontMetrics(NamedTuple):
+    """A font's character widths at one size, in screen pixels
+
+    Attributes:
+        pixel_widths {np.ndarray} -- The width of each code point below TABLE_SIZE, in whole pixels
+        fallback {int} -- The width of code points at or above TABLE_SIZE, in whole pixels
+        max_digit_width {int} -- The width of the font's widest digit, in whole pixels
+    """
+    pixel_widths: np.ndarray
+    fallback: int
+    max_digit_width: int
+
+
+#bundled font tables by lower case font name.  Characters not in a table are given the width of a capital O.
+FONT_TABLES = {
+    "calibri": FontTable(2048, dict(zip(range(32, 127), _CALIBRI_ASCII)), _CALIBRI_ASCII[ord("O") - 32]),
+}
+
+
+@lru_cache(maxsize=None)
+def font_metrics(font: str, fontsize: float = 11) -> FontMetrics:
+    """Gets a font's character widths in pixels at a size.  Results are cached, so repeated exports in the same font only build the table once.
+
+    Arguments:
+        font {str} -- The name of a font in FONT_TABLES, or the path of a TrueType or OpenType font file
+
+    Keyword Arguments:
+        fontsize {float} -- The font size in points (default: {11})
+
+    Raises:
+        ValueError: Raised if there is no table for the font
+
+    Returns:
+        FontMetrics -- The font's pixel widths at that size
+    """
+    if str(font).lower().endswith(FONT_FILE_SUFFIXES):
+        return font_file_metrics(font, fontsize)
+    try:
+        table = FONT_TABLES[font.lower()]
+    except KeyError:
+        raise ValueError(f"No character widths are available for the font {font}") from None
+    return _table_metrics(table, fontsize)
+
+
+def font_file_metrics(path: Union[str, Path], fontsize: float = 11, cache_dir: Union[str, Path] = None) -> FontMetrics:
+    """Gets the character widths of a TrueType or OpenType font file in pixels at a size.  The widths are saved in cache_dir under the hash of the font file and the size, and later calls memory map the saved widths instead of parsing the font again.
+
+    Arguments:
+        path {Union[str, Path]} -- The path of the font file
+
+    Keyword Arguments:
+        fontsize {float} -- The font size in points (default: {11})
+        cache_dir {Union[str, Path]} -- Where to save and look for the widths.  If None, FONT_CACHE_DIR (default: {None})
+
+    Raises:
+        ValueError: Raised if the file is not a font that can be read
+
+    Returns:
+        FontMetrics -- The font's pixel widths at that size
+    """
+    data = Path(path).read_bytes()
+    cache_file = Path(cache_dir or FONT_CACHE_DIR) / f"{sha256(data).hexdigest()[:32]}-{fontsize:g}.npy"
+
+    if not cache_file.exists():
+        metrics = _table_metrics(read_font_table(data), fontsize)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            #written under a temporary name then renamed, so a concurrent export never maps a half written file
+            partial = cache_file.with_suffix(f".{getpid()}.tmp")
+            with open(partial, "wb") as f:
+                #the fallback width rides along as the last element so one array holds everything
+                np.save(f, np.append(metrics.pixel_widths, metrics.fallback).astype(np.int32))
+            partial.replace(cache_file)
+        except OSError:
+            #an unwritable cache only costs speed
+            return metrics
+
+    saved = np.load(cache_file, mmap_mode="r")
+    pixel_widths = saved[:TABLE_SIZE]
+    return FontMetrics(pixel_widths, int(saved[TABLE_SIZE]), int(pixel_widths[ord("0"):ord("9") + 1].max()))
+
+
+def read_font_table(data: bytes) -> FontTable:
+    """Reads the advance width of every character of a TrueType or OpenType font.  Only the Basic Multilingual Plane is read, as that is all FontMetrics has room for.
+
+    Arguments:
+        data {bytes} -- The contents of the font file
+
+    Raises:
+        ValueError: Raised if the data is not a single font with horizontal metrics and a Unicode character map
+
+    Returns:
+        FontTable -- The font's advance widths
+    """
+    tables = _sfnt_tables(data)
+    for required in ("head", "hhea", "hmtx", "cmap"):
+        if required not in tables:
+            raise ValueError(f"Font has no {required} table")
+
+    units_per_em, = struct.unpack_from(">H", data, tables["head"] + 18)
+    metric_count, = struct.unpack_from(">H", data, tables["hhea"] + 34)
+    #every glyph past the last horizontal metric has the same advance as it
+    advances = np.frombuffer(data, dtype=">u2", count=metric_count * 2, offset=tables["hmtx"])[::2].astype(np.int64)
+
+    glyphs = _unicode_glyphs(data, tables["cmap"])
+    glyphs = {code_point:glyph for code_point, glyph in glyphs.items() if code_point < TABLE_SIZE and glyph}
+    char_advances = {code_point:int(advances[min(glyph, metric_count - 1)]) for code_point, glyph in glyphs.items()}
+    #fall back to the width of a capital O as the bundled tables do, or .notdef if the font has no O
+    fallback = char_advances.get(ord("O"), int(advances[0]))
+    return FontTable(units_per_em, char_advances, fallback)
+
+
+def _sfnt_tables(data: bytes) -> dict:
+    if data[:4] == b"ttcf":
+        raise ValueError("Font collections are not supported, extract a single font first")
+    if data[:4] not in (b"\x00\x01\x00\x00", b"OTTO", b"true"):
+        raise ValueError("Not a TrueType or OpenType font")
+    table_count, = struct.unpack_from(">H", data, 4)
+    tables = {}
+    for i in range(table_count):
+        tag, _, offset, _ = struct.unpack_from(">4sIII", data, 12 + 16 * i)
+        tables[tag.decode("latin-1")] = offset
+    return tables
+
+
+def _unicode_glyphs(data: bytes, cmap: int) -> dict:
+    subtable_count, = struct.unpack_from(">H", data, cmap + 2)
+    subtables = {}
+    for i in range(subtable_count):
+        platform, encoding, offset = struct.unpack_from(">HHI", data, cmap + 4 + 8 * i)
+        subtables[(platform, encoding)] = cmap + offset
+
+    #full Unicode maps first, then BMP only ones
+    for key in ((3, 10), (0, 4), (0, 6), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0)):
+        if key in subtables:
+            offset = subtables[key]
+            subtable_format, = struct.unpack_from(">H", data, offset)
+            if subtable_format == 4:
+                return _cmap_format_4(data, offset)
+            if subtable_format == 12:
+                return _cmap_format_12(data, offset)
+    raise ValueError("Font has no Unicode character map that can be read")
+
+
+def _cmap_format_4(data: bytes, offset: int) -> dict:
+    segments = struct.unpack_from(">H", data, offset + 6)[0] // 2
+    ends = struct.unpack_from(f">{segments}H", data, offset + 14)
+    starts = struct.unpack_from(f">{segments}H", data, offset + 16 + 2 * segments)
+    deltas = struct.unpack_from(f">{segments}h", data, offset + 16 + 4 * segments)
+    range_offsets_at = offset + 16 + 6 * segments
+    range_offsets = struct.unpack_from(f">{segments}H", data, range_offsets_at)
+
+    glyphs = {}
+    for i, (start, end, delta, range_offset) in enumerate(zip(starts, ends, deltas, range_offsets)):
+        for code_point in range(start, min(end, 0xFFFE) + 1):
+            if range_offset:
+                #range_offset counts from where it is stored to the glyph id in the glyph id array
+                glyph, = struct.unpack_from(">H", data, range_offsets_at + 2 * i + range_offset + 2 * (code_point - start))
+                glyph = (glyph + delta) % 0x10000 if glyph else 0
+            else:
+                glyph = (code_point + delta) % 0x10000
+            glyphs[code_point] = glyph
+    return glyphs
+
+
+def _cmap_format_12(data: bytes, offset: int) -> dict:
+    group_count, = struct.unpack_from(">I", data, offset + 12)
+    glyphs = {}
+    for i in range(group_count):
+        start, end, start_glyph = struct.unpack_from(">III", data, offset + 16 + 12 * i)
+        for code_point in range(start, min(end, TABLE_SIZE - 1) + 1):
+            glyphs[code_point] = start_glyph + code_point - start
+    return glyphs
+
+
+def _table_metrics(table: FontTable, fontsize: float) -> FontMetrics:
+    #Excel renders each character at a whole number of pixels, so widths are rounded per character before summing
+    scale = fontsize * PIXELS_PER_POINT / table.units_per_em
+    fallback = int(round(table.fallback * scale))
+    pixel_widths = np.full(TABLE_SIZE, fallback, dtype=np.int32)
+    code_points = np.fromiter(table.advances.keys(), dtype=np.int64)
+    pixel_widths[code_points] = np.rint(np.fromiter(table.advances.values(), dtype=np.float64) * scale)
+    #code point 0 pads the ends of shorter strings in an array of strings, it has no width
+    pixel_widths[0] = 0
+    max_digit_width = int(pixel_widths[ord("0"):ord("9") + 1].max())
+    return FontMetrics(pixel_widths, fallback, max_digit_width)
+
+
+def text_pixel_widths(values: Sequence[str], font: str, fontsize: float = 11, by_line: bool = False) -> np.ndarray:
+    """Gets the width of each string in pixels when displayed in a font, without a Python loop over characters
+
+    Arguments:
+        values {Sequence[str]} -- The strings to measure
+        font {str} -- The name of a font in FONT_TABLES, or the path of a font file
+
+    Keyword Arguments:
+        fontsize {float} -- The font size in points (default: {11})
+        by_line {bool} -- If true, gets the width of the longest line of each string instead (default: {False})
+
+    Returns:
+        np.ndarray -- The width of each string in pixels
+    """
+    metrics = font_metrics(font, fontsize)
+    def pixels(code_points):
+        return np.where(code_points < TABLE_SIZE, metrics.pixel_widths[np.minimum(code_points, TABLE_SIZE - 1)], metrics.fallback)
+    return _sum_character_widths(values, pixels, by_line)
+
+
+def display_widths(values: Sequence[str], by_line: bool = False) -> np.ndarray:
+    """Gets the number of columns each string takes up when displayed in a fixed width font: East Asian wide and fullwidth characters (including emoji) take two, combining marks and other zero width characters take none, and everything else takes one
+
+    Arguments:
+        values {Sequence[str]} -- The strings to measure
+
+    Keyword Arguments:
+        by_line {bool} -- If true, gets the width of the longest line of each string instead (default: {False})
+
+    Returns:
+        np.ndarray -- The display width of each string
+    """
+    table = _bmp_display_widths()
+    def columns(code_points):
+        widths = table[np.minimum(code_points, TABLE_SIZE - 1)]
+        beyond = code_points >= TABLE_SIZE
+        if beyond.any():
+            #characters past the BMP are rare, so they're looked up one distinct character at a time
+            distinct, positions = np.unique(code_points[beyond], return_inverse=True)
+            widths[beyond] = np.array([_character_display_width(chr(c)) for c in distinct], dtype=widths.dtype)[positions]
+        return widths
+    return _sum_character_widths(values, columns, by_line)
+
+
+def character_counts(values: Sequence[str], by_line: bool = False) -> np.ndarray:
+    """Gets the number of characters in each string, like str.len
+
+    Arguments:
+        values {Sequence[str]} -- The strings to measure
+
+    Keyword Arguments:
+        by_line {bool} -- If true, gets the number of characters in the longest line of each string instead (default: {False})
+
+    Returns:
+        np.ndarray -- The number of characters of each string
+    """
+    return _sum_character_widths(values, lambda code_points: code_points != 0, by_line)
+
+
+def line_counts(values: Sequence[str]) -> np.ndarray:
+    """Gets the number of lines in each string, for sizing rows of wrapped text
+
+    Arguments:
+        values {Sequence[str]} -- The strings to measure
+
+    Returns:
+        np.ndarray -- The number of lines of each string, at least 1
+    """
+    return _sum_character_widths(values, lambda code_points: code_points == _LINE_BREAK) + 1
+
+
+def _sum_character_widths(values: Sequence[str], character_widths, by_line: bool = False) -> np.ndarray:
+    strings = np.asarray(values, dtype=object)
+    totals = np.zeros(len(strings), dtype=np.int64)
+    #anything that isn't a string is measured as str() of it, as it is when converted to a unicode array
+    lengths = np.fromiter(map(len, map(str, strings)), dtype=np.int64, count=len(strings))
+    #strings are measured in blocks of similar length, each padded only to the longest of its block, so one long value widens only the few strings measured with it
+    length_classes = np.ceil(np.log2(np.maximum(lengths, 1))).astype(np.int64)
+    for length_class in np.unique(length_classes):
+        positions = np.flatnonzero(length_classes == length_class)
+        strings_per_block = max(_CODE_POINTS_PER_BLOCK >> int(length_class), 1)
+        for start in range(0, len(positions), strings_per_block):
+            block_positions = positions[start:start + strings_per_block]
+            #only this block is converted, into a fixed width block of UTF-32 code points that can be looked up directly
+            block = strings[block_positions].astype(f"<U{max(int(lengths[block_positions].max()), 1)}")
+            code_points = block.view(np.uint32).reshape(len(block), -1)
+            widths = character_widths(code_points)
+            if by_line:
+                totals[block_positions] = _longest_lines(code_points, widths)
+            else:
+                totals[block_positions] = widths.sum(axis=1, dtype=np.int64)
+    return totals
+
+
+def _longest_lines(code_points: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    line_breaks = code_points == _LINE_BREAK
+    widths = np.where(line_breaks | (code_points == _CARRIAGE_RETURN), 0, widths)
+    #each line's width is the running total at its end less the running total at the line break before it
+    running = np.cumsum(widths, axis=1, dtype=np.int64)
+    #no width is negative, so the running total at the last line break is the largest at any line break so far.  Both are worked out in place, so a block needs only two arrays of totals.
+    before_line = np.where(line_breaks, running, 0)
+    np.maximum.accumulate(before_line, axis=1, out=before_line)
+    running -= before_line
+    return running.max(axis=1)
+
+
+@lru_cache(maxsize=None)
+def _bmp_display_widths() -> np.ndarray:
+    table = np.array([_character_display_width(chr(c)) for c in range(TABLE_SIZE)], dtype=np.int8)
+    #code point 0 pads the ends of shorter strings in an array of strings, it has no width
+    table[0] = 0
+    return table
+
+
+def _character_display_width(char: str) -> int:
+    if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf") or char in _ZERO_WIDTH:
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+def text_width(values: Sequence[str], font: str, fontsize: float = 11, by_line: bool = False) -> float:
+    """Gets the width of the widest string when displayed in a font, counted in widths of its widest digit, the unit Excel column widths are measured in
+
+    Arguments:
+        values {Sequence[str]} -- The strings to measure
+        font {str} -- The name of a font in FONT_TABLES, or the path of a font file
+
+    Keyword Arguments:
+        fontsize {float} -- The font size in points (default: {11})
+        by_line {bool} -- If true, gets the width of the widest line of any string instead (default: {False})
+
+    Returns:
+        float -- The width of the widest string in digit widths, NaN if there are no strings
+    """
+    widths = text_pixel_widths(values, font, fontsize, by_line)
+    if not widths.size:
+        return np.nan
+    return widths.max() / font_metrics(font, fontsize).max_digit_width
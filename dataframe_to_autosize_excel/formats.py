@@ -0,0 +1,148 @@
+import re
+
+import numpy as np
+
+#the longest English month and day names, which Excel shows for mmmm and dddd
+LONGEST_MONTH_NAME = len("September")
+LONGEST_DAY_NAME = len("Wednesday")
+
+#tokens of an Excel number format that render as something other than themselves, longest alternatives first
+_FORMAT_TOKENS = re.compile(r'"[^"]*"|\\.|_.|\*.|\[[^\]]*\]|AM/PM|A/P|y+|e+|m+|d+|h+|s+|.', re.IGNORECASE)
+#bracketed elapsed time tokens, e.g. [h] or [mm], as opposed to colours and locales which render nothing
+_ELAPSED_TIME = re.compile(r'\[(h+|m+|s+)\]', re.IGNORECASE)
+
+
+def excel_format_width(num_format: str) -> int:
+    """Gets the widest a date or time can be when displayed by Excel with a number format.  Tokens whose width varies by value (e.g. d, mmmm) count as their widest.
+
+    Arguments:
+        num_format {str} -- An Excel number format, e.g. "yyyy-mm-dd  hh:mm:ss"
+
+    Returns:
+        int -- The number of characters of the widest displayed value
+    """
+    #a format may have sections for positive;negative;zero;text, dates are never negative so the first is the one shown
+    section = _split_sections(num_format)[0]
+    return sum(_token_width(token) for token in _FORMAT_TOKENS.findall(section))
+
+
+def _split_sections(num_format: str) -> list:
+    sections, current, quoted = [], "", False
+    for char in num_format:
+        if char == '"':
+            quoted = not quoted
+        if char == ";" and not quoted:
+            sections.append(current)
+            current = ""
+        else:
+            current += char
+    return sections + [current]
+
+
+def _token_width(token: str) -> int:
+    lowered = token.lower()
+    if token.startswith('"'):
+        return len(token) - 2
+    if token.startswith(("\\", "_")):
+        #an escaped character, or padding the width of one
+        return 1
+    if token.startswith("*"):
+        #repeats to fill the cell, so it needs no width of its own
+        return 0
+    if token.startswith("["):
+        return 2 if _ELAPSED_TIME.fullmatch(token) else 0
+    if lowered == "am/pm":
+        return 2
+    if lowered == "a/p":
+        return 1
+    if lowered[0] == "y":
+        return 2 if len(token) <= 2 else 4
+    if lowered[0] == "e":
+        return 4
+    if lowered[0] == "m":
+        #m and mm are the month or minutes, both at most two digits.  mmmmm is the first letter of the month.
+        if len(token) <= 3:
+            return 2 if len(token) <= 2 else 3
+        return 1 if len(token) == 5 else LONGEST_MONTH_NAME
+    if lowered[0] == "d":
+        if len(token) <= 3:
+            return 2 if len(token) <= 2 else 3
+        return LONGEST_DAY_NAME
+    if lowered[0] in "hs":
+        return 2
+    return len(token)
+
+
+#the most characters Excel's General format uses to display a non-negative number, a "-" is added to negative ones
+GENERAL_MAX_WIDTH = 11
+
+
+def excel_general_widths(values: np.ndarray) -> np.ndarray:
+    """Gets the width of each number as displayed by Excel's General number format, which shows at most GENERAL_MAX_WIDTH characters and switches to scientific notation (e.g. 1.23457E+11) when a number cannot fit in that many
+
+    Arguments:
+        values {np.ndarray} -- Finite numbers
+
+    Returns:
+        np.ndarray -- The number of characters Excel displays for each number
+    """
+    magnitudes = np.abs(np.asarray(values, dtype=np.float64))
+    nonzero = magnitudes > 0
+    exponents = np.zeros(magnitudes.shape, dtype=np.int64)
+    exponents[nonzero] = _decimal_exponents(magnitudes[nonzero])
+
+    #numbers whose exponent is far enough from 0 are only ever shown in scientific notation
+    widths = _scientific_widths(magnitudes, exponents)
+
+    #below 1, up to 9 decimal places are shown.  From 1e-5 down that is only when no more digits are needed, otherwise it's scientific.
+    small = nonzero & (exponents >= -9) & (exponents <= -1)
+    scaled = np.rint(magnitudes[small] * 1e9).astype(np.int64)
+    fits = (exponents[small] >= -4) | (np.rint(magnitudes[small] * 1e12).astype(np.int64) == scaled * 1000)
+    fixed = np.where(scaled >= 10**9, 1, 2 + 9 - _trailing_zeros(scaled, 9))
+    widths[small] = np.where(fits, fixed, widths[small])
+
+    #from 1 up to 1e10, 10 significant digits are shown with no more decimal places than needed
+    large = nonzero & (exponents >= 0) & (exponents <= 9)
+    decimals = 9 - exponents[large]
+    scaled = np.rint(magnitudes[large] * 10.0**decimals).astype(np.int64)
+    powers = 10**decimals
+    integer_digits = _digit_counts(scaled // powers)
+    places = np.where(scaled % powers == 0, 0, decimals - _trailing_zeros(scaled % powers, 9))
+    widths[large] = integer_digits + np.where(places > 0, places + 1, 0)
+
+    #11 digit numbers are truncated to their integer part
+    widths[nonzero & (exponents == 10)] = GENERAL_MAX_WIDTH
+    widths[~nonzero] = 1
+    return widths + (np.asarray(values) < 0)
+
+
+def _decimal_exponents(magnitudes: np.ndarray) -> np.ndarray:
+    exponents = np.floor(np.log10(magnitudes)).astype(np.int64)
+    #log10 can land on the wrong side of an exact power of ten
+    exponents -= 10.0**exponents > magnitudes
+    exponents += 10.0**(exponents + 1) <= magnitudes
+    return exponents
+
+
+def _scientific_widths(magnitudes: np.ndarray, exponents: np.ndarray) -> np.ndarray:
+    #6 significant digits, e.g. 1.23457E+11, with trailing zeros of the mantissa dropped
+    mantissas = np.rint(magnitudes / 10.0**exponents.astype(np.float64) * 1e5).astype(np.int64)
+    carried = mantissas >= 10**6
+    mantissas = np.where(carried, 10**5, mantissas)
+    exponents = exponents + carried
+    places = 5 - _trailing_zeros(mantissas, 5)
+    return 1 + np.where(places > 0, places + 1, 0) + 2 + np.maximum(_digit_counts(np.abs(exponents)), 2)
+
+
+def _trailing_zeros(integers: np.ndarray, most: int) -> np.ndarray:
+    zeros = np.zeros(integers.shape, dtype=np.int64)
+    for place in range(1, most + 1):
+        zeros += (integers % 10**place == 0) & (zeros == place - 1)
+    return zeros
+
+
+def _digit_counts(integers: np.ndarray) -> np.ndarray:
+    digits = np.ones(integers.shape, dtype=np.int64)
+    for place in range(1, 19):
+        digits += integers >= 10**place
+    return digits
@@ -0,0 +1,84 @@
+import json
+from collections import defaultdict
+from math import isnan
+from typing import Dict, Mapping, Optional
+
+#custom document properties hold at most 255 characters of text, so the metadata of a sheet is split across as many as it needs
+PROPERTY_LENGTH = 255
+PROPERTY_PREFIX = "autosize"
+METADATA_VERSION = 1
+
+#the options a sheet was written with that decide how later rows must be rendered and measured to match it
+STORED_OPTIONS = ("na_rep", "float_format", "inf_rep", "excel_date_format", "excel_datetime_format",
+                  "font", "fontsize", "east_asian_width", "multiline", "max_width", "min_width")
+
+
+def width_metadata(widths: list, rows: int, startrow: int, startcol: int, header: bool, **options) -> dict:
+    """Gets the metadata to store with a sheet so rows can later be appended to it without measuring those already written
+
+    Arguments:
+        widths {list} -- The width in characters of each column of the sheet, in order.  NaN for a column with no width.
+        rows {int} -- The number of rows of data below the header
+        startrow {int} -- The zero-indexed row of the sheet the data begins at
+        startcol {int} -- The zero-indexed column of the sheet the data begins at
+        header {bool} -- If true, the sheet has a header row above its data
+        **options -- The STORED_OPTIONS the sheet was written with
+
+    Returns:
+        dict -- Metadata that can be serialized as JSON
+    """
+    return {"version": METADATA_VERSION,
+            "widths": [None if isnan(w) else float(w) for w in widths],
+            "rows": int(rows),
+            "startrow": startrow,
+            "startcol": startcol,
+            "header": bool(header),
+            "options": {option:options[option] for option in STORED_OPTIONS}}
+
+
+def metadata_properties(sheet_name: str, metadata: dict) -> Dict[str, str]:
+    """Splits the metadata of a sheet into custom document properties short enough for Excel
+
+    Arguments:
+        sheet_name {str} -- The sheet the metadata describes
+        metadata {dict} -- Metadata from width_metadata
+
+    Returns:
+        Dict[str, str] -- The value of each property by its name
+    """
+    text = json.dumps(metadata, separators=(",", ":"))
+    return {f"{PROPERTY_PREFIX} {sheet_name} {part}": text[start:start + PROPERTY_LENGTH]
+            for part, start in enumerate(range(0, len(text), PROPERTY_LENGTH))}
+
+
+def read_metadata_properties(properties: Mapping[str, str]) -> Dict[str, dict]:
+    """Reassembles the metadata of every sheet from a workbook's custom document properties
+
+    Arguments:
+        properties {Mapping[str, str]} -- The value of each custom document property by its name.  Properties not written by metadata_properties are ignored.
+
+    Returns:
+        Dict[str, dict] -- The metadata of each sheet that has any, by sheet name
+    """
+    parts = defaultdict(dict)
+    for name, value in properties.items():
+        sheet_name = metadata_sheet(name)
+        if sheet_name is not None:
+            parts[sheet_name][int(name.rpartition(" ")[2])] = value
+    return {sheet_name: json.loads("".join(sheet_parts[part] for part in sorted(sheet_parts)))
+            for sheet_name, sheet_parts in parts.items()}
+
+
+def metadata_sheet(name: str) -> Optional[str]:
+    """Gets the sheet whose metadata a custom document property holds part of
+
+    Arguments:
+        name {str} -- The name of the property
+
+    Returns:
+        Optional[str] -- The name of the sheet, or None if the property was not written by metadata_properties
+    """
+    prefix, _, rest = name.partition(" ")
+    #sheet names may contain spaces, but the part number never does
+    sheet_name, _, part = rest.rpartition(" ")
+    return sheet_name if prefix == PROPERTY_PREFIX and sheet_name and part.isdigit() else None
@@ -0,0 +1,205 @@
+from datetime import date, datetime
+from math import isinf, isnan
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+from pandas import NA, DataFrame, MultiIndex, NaT, Series, Timestamp
+from pandas.api.types import infer_dtype, is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_integer_dtype, is_object_dtype
+
+from .widths import _round_floats
+
+#the days of Excel serial dates count from these, depending on whether the workbook uses the 1904 date system
+_EXCEL_EPOCH = np.datetime64("1899-12-31", "us")
+_EXCEL_1904_EPOCH = np.datetime64("1904-01-01", "us")
+_MICROSECONDS_PER_DAY = 86_400_000_000
+#Excel wrongly counts 29 February 1900, so serial dates after it are a day later than the days since the epoch
+_EXCEL_LEAP_DAY = 59
+
+
+def native_layout_supported(df: DataFrame, index: bool) -> bool:
+    """Checks whether write_frame lays out a DataFrame the same way DataFrame.to_excel does.  Hierarchical labels are merged across cells by to_excel, which write_frame does not do.
+
+    Arguments:
+        df {DataFrame} -- The data to be output
+        index {bool} -- If true, the index is written too
+
+    Returns:
+        bool -- True if write_frame can write it
+    """
+    return not isinstance(df.columns, MultiIndex) and not (index and isinstance(df.index, MultiIndex))
+
+
+def write_frame(ws, df: DataFrame, data: DataFrame, formats: Dict[type, object],
+                header: Union[bool, List[str]]=True,
+                index: bool=True,
+                index_label: Union[str, Sequence]=None,
+                startrow: int=0,
+                startcol: int=0,
+                na_rep: str='',
+                float_format: str=None,
+                inf_rep: str='inf'):
+    """Writes a DataFrame into a worksheet with the layout of DataFrame.to_excel, driving xlsxwriter directly one column at a time.  Each column is converted to Python values in one operation, and numbers, booleans and datetimes are written without inspecting the type of every value.
+
+    Arguments:
+        ws {Worksheet} -- The xlsxwriter worksheet to write to
+        df {DataFrame} -- The data to be output, for its labels
+        data {DataFrame} -- The columns to write, in order, with the index (if written) as leading regular columns, as in ExportView.data
+        formats {Dict[type, object]} -- The xlsxwriter format of datetime and date values
+
+    Keyword Arguments:
+        header {Union[bool, List[str]]} -- True to write the DataFrame's column labels, False to write no header, or a list of alternative column labels (default: {True})
+        index {bool} -- If true, data begins with the index columns (default: {True})
+        index_label {Union[str, Sequence]} -- Alternative column headers for index columns. (default: {None})
+        startrow {int} -- The zero-indexed row of the worksheet to begin writing data (default: {0})
+        startcol {int} -- The zero-indexed column of the worksheet to begin writing data (default: {0})
+        na_rep {str} -- How null values should be represented in the output (default: {''})
+        float_format {str} -- Format string for floating point numbers. (default: {None})
+        inf_rep {str} -- How the value of infinity will be represnted in the output (default: {'inf'})
+    """
+    row = startrow
+    if header is not False:
+        for offset, label in enumerate(header_labels(df, data, header, index, index_label)):
+            if label is not None:
+                ws.write(row, startcol + offset, label)
+        row += 1
+
+    for offset, column_name in enumerate(data.columns):
+        _write_column(ws, row, startcol + offset, data[column_name], formats, na_rep, float_format, inf_rep)
+
+
+def header_labels(df: DataFrame, data: DataFrame, header: Union[bool, List[str]]=True, index: bool=True, index_label: Union[str, Sequence]=None) -> list:
+    """Gets the header DataFrame.to_excel writes above each column
+
+    Arguments:
+        df {DataFrame} -- The data to be output, for its labels
+        data {DataFrame} -- The columns to write, as in ExportView.data
+
+    Keyword Arguments:
+        header {Union[bool, List[str]]} -- True for the DataFrame's column labels, or a list of alternative column labels (default: {True})
+        index {bool} -- If true, data begins with the index columns (default: {True})
+        index_label {Union[str, Sequence]} -- Alternative column headers for index columns. (default: {None})
+
+    Returns:
+        list -- The header of each column of data, None for a cell left empty
+    """
+    index_labels = []
+    if index:
+        #an unnamed index has no header, unlike in ExportView.labels
+        index_labels = [index_label] if isinstance(index_label, str) else list(index_label or df.index.names)
+    column_labels = list(header) if not isinstance(header, bool) else list(data.columns[len(index_labels):])
+    return index_labels + column_labels
+
+
+def _write_column(ws, first_row: int, column: int, series: Series, formats: Dict[type, object], na_rep: str, float_format: str, inf_rep: str):
+    missing = series.isna().to_numpy()
+    if missing.any() and na_rep:
+        for row in np.flatnonzero(missing):
+            ws.write_string(first_row + row, column, na_rep)
+
+    if is_bool_dtype(series.dtype):
+        for row, value in zip(np.flatnonzero(~missing), series[~missing].tolist()):
+            ws.write_boolean(first_row + row, column, value)
+    elif is_integer_dtype(series.dtype):
+        for row, value in zip(np.flatnonzero(~missing), series[~missing].tolist()):
+            ws.write_number(first_row + row, column, value)
+    elif is_float_dtype(series.dtype):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        finite = np.isfinite(values)
+        #_round_floats gives exactly float(float_format % value), which is what to_excel writes
+        for row, value in zip(np.flatnonzero(finite), _round_floats(values[finite], float_format).tolist()):
+            ws.write_number(first_row + row, column, value)
+        for row in np.flatnonzero(np.isinf(values)):
+            ws.write_string(first_row + row, column, inf_rep if values[row] > 0 else "-" + inf_rep)
+    elif is_datetime64_any_dtype(series.dtype):
+        #to_excel refuses these rather than choosing a timezone to show them in, and so does this
+        if getattr(series.dtype, "tz", None) is not None:
+            raise ValueError("Excel does not support datetimes with timezones. Please ensure that datetimes are timezone unaware before writing to Excel.")
+        serials = excel_serials(series.to_numpy()[~missing], ws.date_1904)
+        for row, value in zip(np.flatnonzero(~missing), serials.tolist()):
+            ws.write_number(first_row + row, column, value, formats[datetime])
+    elif is_object_dtype(series.dtype) and infer_dtype(series, skipna=True) == "date":
+        #a column of nothing but dates (and missing values) is converted together, just like a datetime64 column
+        dates = np.array(series[~missing].tolist(), dtype="datetime64[D]")
+        serials = excel_serials(dates, ws.date_1904, time_of_day=False)
+        for row, value in zip(np.flatnonzero(~missing), serials.tolist()):
+            ws.write_number(first_row + row, column, value, formats[date])
+    else:
+        #object, string and categorical columns may hold anything, so every value is rendered as to_excel would render it
+        for row, value in enumerate(series.to_numpy(dtype=object).tolist(), first_row):
+            write_cell(ws, row, column, value, formats, na_rep, float_format, inf_rep)
+
+
+def excel_serials(values: np.ndarray, date_1904: bool = False, time_of_day: bool = True) -> np.ndarray:
+    """Converts datetimes into the serial dates Excel stores them as, all at once.  The serials are exactly those xlsxwriter's write_datetime stores for the same values as Python datetimes, to the microsecond.
+
+    Arguments:
+        values {np.ndarray} -- datetime64 values, none of them NaT
+
+    Keyword Arguments:
+        date_1904 {bool} -- If true, the serials are of a workbook using the 1904 date system (default: {False})
+        time_of_day {bool} -- False if the values are dates rather than datetimes, as xlsxwriter only applies one of Excel's quirks to datetimes (default: {True})
+
+    Returns:
+        np.ndarray -- The serial date of each value, as days since the epoch with the time of day as a fraction of a day
+    """
+    microseconds = (values.astype("datetime64[us]") - (_EXCEL_1904_EPOCH if date_1904 else _EXCEL_EPOCH)).astype(np.int64)
+    days, remainder = np.divmod(microseconds, _MICROSECONDS_PER_DAY)
+    #the same arithmetic as xlsxwriter, so the floating point rounding is the same too
+    serials = days + (remainder // 1_000_000 + (remainder % 1_000_000) / 1e6) / 86400
+    if not date_1904:
+        if time_of_day:
+            #a time of day alone is stored on the 0th of January 1900, which xlsxwriter also applies to datetimes on the 1st
+            serials -= days == 1
+        serials += serials > _EXCEL_LEAP_DAY
+    return serials
+
+
+def rendered_value(value, na_rep: str, float_format: str, inf_rep: str) -> tuple:
+    """Renders a single value as DataFrame.to_excel would, for any writer to write
+
+    Arguments:
+        value -- The value to render
+        na_rep {str} -- How null values should be represented
+        float_format {str} -- Format string for floating point numbers
+        inf_rep {str} -- How the value of infinity should be represented
+
+    Returns:
+        tuple -- The value to write, None for a cell left empty, and how to write it: str for text that must not be read as a formula or number, datetime or date for a value taking that number format, or None for anything else
+    """
+    if value is None or value is NaT or value is NA or (isinstance(value, float) and isnan(value)):
+        return (na_rep or None), str
+    if isinstance(value, float) and isinf(value):
+        return (inf_rep if value > 0 else "-" + inf_rep), str
+    if isinstance(value, float) and float_format:
+        return float(float_format % value), None
+    if isinstance(value, Timestamp):
+        return value.to_pydatetime(), datetime
+    if isinstance(value, datetime):
+        return value, datetime
+    if isinstance(value, date):
+        return value, date
+    return value, None
+
+
+def write_cell(ws, row: int, column: int, value, formats: Dict[type, object], na_rep: str, float_format: str, inf_rep: str):
+    """Writes a single value into a worksheet as DataFrame.to_excel would render it
+
+    Arguments:
+        ws {Worksheet} -- The xlsxwriter worksheet to write to
+        row {int} -- The zero-indexed row of the cell
+        column {int} -- The zero-indexed column of the cell
+        value -- The value to write
+        formats {Dict[type, object]} -- The xlsxwriter format of datetime and date values
+        na_rep {str} -- How null values should be represented
+        float_format {str} -- Format string for floating point numbers
+        inf_rep {str} -- How the value of infinity should be represented
+    """
+    value, kind = rendered_value(value, na_rep, float_format, inf_rep)
+    if value is None:
+        return
+    if kind is str:
+        ws.write_string(row, column, value)
+    elif kind is None:
+        ws.write(row, column, value)
+    else:
+        ws.write_datetime(row, column, value, formats[kind])
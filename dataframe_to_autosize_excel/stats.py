@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class ExportStats:
+    """Where the time of an export went.  Pass one to to_autosize_excel and it is filled in as the export runs, so the phases that did finish are recorded even if a later one fails.
+
+    Attributes:
+        phases {Dict[str, float]} -- Wall time in seconds of each phase of the export, in the order they ran: 'labels' (resolving the exported columns and their headers), 'widths' (measuring every column), 'to_excel', 'set_column', 'set_row' (only when multiline), 'header' (only when headers are rewritten) and 'close' (zipping the workbook to disk)
+        column_seconds {Dict[str, float]} -- Time in seconds spent measuring each column, by column label.  Columns whose width came from a WidthCache are absent.  When columns are measured in parallel, these add up to more than the 'widths' phase.
+        rows {int} -- The number of rows written, including the header
+        cells {int} -- The number of cells written, including the header
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.column_seconds = {}
+        self.rows = 0
+        self.cells = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times the code run within it as a phase of the export, adding to the time of any earlier phase of the same name
+
+        Arguments:
+            name {str} -- The name of the phase
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + perf_counter() - start
+
+    @property
+    def total_seconds(self) -> float:
+        """The wall time in seconds of every phase together"""
+        return sum(self.phases.values())
+
+    def slowest_columns(self, n: int = 5) -> list:
+        """Gets the columns that took longest to measure
+
+        Keyword Arguments:
+            n {int} -- The most columns to get (default: {5})
+
+        Returns:
+            list -- (column label, seconds) pairs, slowest first
+        """
+        return sorted(self.column_seconds.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def __repr__(self):
+        phases = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in self.phases.items())
+        return f"ExportStats({phases}, total={self.total_seconds:.3f}s, rows={self.rows}, cells={self.cells})"
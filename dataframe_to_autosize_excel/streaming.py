@@ -0,0 +1,110 @@
+from datetime import date, datetime
+from math import isnan
+from os import PathLike
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+from pandas import DataFrame
+from xlsxwriter import Workbook
+
+from .dataframe_to_autosize_excel import excel_column_width, export_view, maximum_character_widths, _output_target
+from .native import header_labels, write_cell
+
+
+def to_autosize_excel_chunked(chunks: Iterable[DataFrame],
+                              outfile: Union[PathLike, BinaryIO],
+                              consider_headers: bool = True,
+                              sheet_name: str='Sheet1',
+                              na_rep: str='',
+                              float_format: str=None,
+                              columns: Union[Sequence[str], List[str]]=None,
+                              header: Union[bool, List[str]]=True,
+                              index: bool=True,
+                              index_label: Union[str, Sequence]=None,
+                              startrow: int=0,
+                              startcol: int=0,
+                              inf_rep: str='inf',
+                              freeze_panes: Tuple[int,int]=None,
+                              excel_date_format: str = "yyyy-mm-dd",
+                              excel_datetime_format: str = "yyyy-mm-dd  hh:mm:ss") -> Union[Path, BinaryIO]:
+    """Same as to_autosize_excel, but writes the data from an iterable of DataFrames (e.g. read_csv or read_sql with chunksize) one chunk at a time.  Rows are flushed to disk as they are written, so memory use is bounded by the size of a chunk rather than the size of the data.
+
+    Arguments:
+        chunks {Iterable[DataFrame]} -- The data to be output into an xlsx file, in order.  Every chunk must have the same columns.
+        outfile {Union[PathLike, BinaryIO]} -- A pathlike object representing the full path and filename of the output xlsx file, or a writable binary file-like object (e.g. BytesIO) to write it to
+
+    Keyword Arguments:
+        consider_headers {bool} -- If true, consider the width of the column headers when sizing columns (default: {True})
+        sheet_name {str} -- The sheet of the workbook to write the data(default: {'Sheet1'})
+        na_rep {str} -- How null values should be represented in the output (default: {''})
+        float_format {str} -- Format string for floating point numbers. (default: {None})
+        columns {Union[Sequence[str], List[str]]} -- If given, only these columns will be written to the file (default: {None})
+        header {Union[bool, List[str]]} -- True to write the DataFrame's column labels, False to write no header, or a list of alternative column labels (default: {True})
+        index {bool} -- If true, write the index columns in the output (default: {True})
+        index_label {Union[str, Sequence]} -- Alternative column headers for index columns. (default: {None})
+        startrow {int} -- The zero-indexed row of the xlsx file to begin writing data (default: {0})
+        startcol {int} -- The zero-indexed column of the xlsx file to begin writing data (default: {0})
+        inf_rep {str} -- How the value of infinity will be represnted in the output (default: {'inf'})
+        freeze_panes {Tuple[int,int]} -- Specifies the one-based bottommost row and rightmost column that is to be frozen. (default: {None})
+        excel_date_format {str} -- Format string for dates written into Excel files  (default: {"yyyy-mm-dd"})
+        excel_datetime_format {str} -- Format string for datetime objects written into Excel files (default: {"yyyy-mm-dd  hh:mm:ss"})
+
+    Raises:
+        ValueError: Raised if chunks is empty
+
+    Returns:
+        Union[Path, BinaryIO] -- A Path object representing the successfully written xlsx output, or outfile itself if it is file-like
+    """
+    target = _output_target(outfile)
+    #constant_memory flushes each row as soon as a later row is started, which is what bounds memory use
+    wb = Workbook(target if hasattr(target, "write") else str(target), {"constant_memory": True})
+
+    try:
+        ws = wb.add_worksheet(sheet_name)
+        formats = {datetime: wb.add_format({"num_format": excel_datetime_format}),
+                   date: wb.add_format({"num_format": excel_date_format})}
+        header_format = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+
+        widths = None
+        labels = None
+        row = startrow
+        for chunk in chunks:
+            view = export_view(chunk, columns, header, index, index_label)
+            if labels is None:
+                labels = view.labels
+                if header is not False:
+                    for offset, label in enumerate(header_labels(chunk, view.data, header, index, index_label)):
+                        if label is not None:
+                            ws.write(row, startcol + offset, label, header_format)
+                    row += 1
+
+            #only the widths seen so far need to be kept, never the rows they came from.  They are measured as the cells are written.
+            chunk_widths = maximum_character_widths(view.data, False, labels, width_sampling=False, excel_datetime_format=excel_datetime_format,
+                                                    na_rep=na_rep, float_format=float_format, inf_rep=inf_rep)
+            if widths is None:
+                widths = chunk_widths
+            else:
+                widths = {k:np.fmax(widths[k], v) for k,v in chunk_widths.items()}
+
+            for values in view.data.itertuples(index=False, name=None):
+                for offset, value in enumerate(values):
+                    write_cell(ws, row, startcol + offset, value, formats, na_rep, float_format, inf_rep)
+                row += 1
+
+        if labels is None:
+            raise ValueError("At least one DataFrame is required to write an xlsx file")
+
+        for offset, (column_name, label) in enumerate(zip(widths, labels)):
+            width = max(len(label), widths[column_name]) if consider_headers and header is not False else widths[column_name]
+            #a column of nothing but missing values has no width of its own
+            if not isnan(width):
+                ws.set_column(startcol + offset, startcol + offset, excel_column_width(width))
+
+        if freeze_panes:
+            ws.freeze_panes(*freeze_panes)
+    finally:
+        wb.close()
+
+    return target
+
@@ -0,0 +1,488 @@
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from os import cpu_count
+from time import perf_counter
+from typing import Callable, Dict, List, NamedTuple, Tuple, Union
+
+import numpy as np
+from pandas import ArrowDtype, Categorical, CategoricalDtype, DataFrame, Series, StringDtype
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_integer_dtype
+
+from .fonts import character_counts, display_widths, text_width
+from .formats import excel_format_width, excel_general_widths
+
+#columns longer than this are sampled rather than fully scanned when width sampling is left on automatic.  Measuring a sample of DEFAULT_SAMPLE_SIZE rows of text takes about as long as a full scan of this many, so longer columns are always quicker to sample.
+SAMPLING_THRESHOLD = 100_000
+#number of rows measured per sampled column when no sample size is given
+DEFAULT_SAMPLE_SIZE = 10_000
+#number of rows from each end of a column that are always measured when sampling
+HEAD_TAIL_ROWS = 100
+#float formats of the form %.Nf, which can be applied by rounding rather than formatting every value
+_FIXED_POINT_FORMAT = re.compile(r"%\.(\d+)f")
+#the most decimals whose power of ten is an exact float, so a rounded integer divided by it is the same float as the formatted decimal
+_EXACT_DECIMALS = 15
+#scaled values this close to halfway between integers may round differently to the exact decimal value they approximate
+_HALFWAY_TOLERANCE = 1e-6
+#scaled values smaller than this carry an error of scaling far below _HALFWAY_TOLERANCE
+_EXACT_SCALED = 2.0 ** 30
+#frames with fewer cells than this are always measured serially.  Starting a pool of threads costs a few milliseconds, about as long as measuring 50,000 cells of text, so this keeps it under a tenth of the time the pool could save.
+PARALLEL_THRESHOLD = 500_000
+#rows measured at a time in a column with a maximum width, so the rest of the column is not measured once one chunk reaches it
+CAPPED_CHUNK_ROWS = 65_536
+
+
+class SampledWidth(NamedTuple):
+    """The estimated width of a column
+
+    Attributes:
+        width {float} -- The maximum character width found
+        miss_probability {float} -- The estimated probability that the column is wider than width, i.e. that its widest row was not sampled.  At most 1 - n/N for n rows sampled of N, and 0 if every row was measured.
+    """
+    width: float
+    miss_probability: float
+
+
+def column_character_width(series: Series, **render_options) -> float:
+    """Gets the maximum character width of the string representation of a column, choosing the cheapest calculation its dtype allows
+
+    Arguments:
+        series {Series} -- The column to measure
+
+    Keyword Arguments:
+        **render_options -- How values will be displayed in Excel.  excel_datetime_format sizes datetime columns by that number format rather than by str(value).  na_rep is as for string_width, and font, fontsize and east_asian_width as for text_length, although numbers and dates are always counted in characters as every digit is the same width.  float_format rounds floats before measuring them, as DataFrame.to_excel does before writing them, and inf_rep is measured in place of infinity.
+
+    Returns:
+        float -- The length of the longest value of the column as a string, or NaN if the column is empty
+    """
+    calculator = _exact_calculator(series.dtype, **render_options)
+    if calculator is not None:
+        return calculator(series, **render_options)
+    return string_width(series, **render_options)
+
+
+def string_width(series: Series, na_rep: str = None, **render_options) -> float:
+    """Measures a column by converting every value to a string.  This is the slow path every other calculator must agree with.
+
+    Arguments:
+        series {Series} -- The column to measure
+
+    Keyword Arguments:
+        na_rep {str} -- If given, missing values are measured as this instead of as astype(str) renders them (default: {None})
+        **render_options -- How the strings are measured, as for text_length
+
+    Returns:
+        float -- The length of the longest value of the column as a string, or NaN if the column is empty
+    """
+    if na_rep is None and not _measures_characters(**render_options):
+        return series.astype(str).str.len().max()
+
+    present = series[series.notna()] if series.hasnans else series
+    return _widest([text_length(present.astype(str), **render_options), missing_value_width(series, na_rep, **render_options)])
+
+
+def text_length(strings: Series, font: str = None, fontsize: float = 11, east_asian_width: bool = False, multiline: bool = False, **render_options) -> float:
+    """Measures the longest of some strings, by default by counting their characters
+
+    Arguments:
+        strings {Series} -- The strings to measure
+
+    Keyword Arguments:
+        font {str} -- If given, strings are measured by the widths of their characters in this font (see fonts.text_width) (default: {None})
+        fontsize {float} -- The size of font in points (default: {11})
+        east_asian_width {bool} -- If true, strings are measured by how many columns they take up in a fixed width font (see fonts.display_widths), so East Asian wide characters count twice and combining marks not at all.  Ignored when a font is given. (default: {False})
+        multiline {bool} -- If true, only the longest line of each string is measured, as a wrapped cell shows each line separately (default: {False})
+
+    Returns:
+        float -- The length of the longest string, or NaN if there are none
+    """
+    if font is not None:
+        return text_width(strings, font, fontsize, multiline)
+    if east_asian_width or multiline:
+        widths = display_widths(strings, multiline) if east_asian_width else character_counts(strings, multiline)
+        return widths.max() if widths.size else np.nan
+    return strings.str.len().max()
+
+
+def _measures_characters(font: str = None, east_asian_width: bool = False, multiline: bool = False, **render_options) -> bool:
+    return font is not None or east_asian_width or multiline
+
+
+def _round_floats(values: np.ndarray, float_format: str = None) -> np.ndarray:
+    #to_excel writes float(float_format % value), a number, so it is the rounded value that is displayed rather than the formatted string
+    if float_format is None:
+        return values
+    fixed_point = _FIXED_POINT_FORMAT.fullmatch(float_format)
+    if not fixed_point or int(fixed_point.group(1)) > _EXACT_DECIMALS:
+        return np.char.mod(float_format, values).astype(np.float64)
+    scale = 10.0 ** int(fixed_point.group(1))
+    scaled = values * scale
+    rounded = np.rint(scaled) / scale
+    #% rounds the exact decimal value, which the scaled value only approximates.  Where the error of scaling could put it on the other side of a halfway point, or the value is too large for that error to be small, the value is formatted as to_excel does.
+    uncertain = (np.abs(np.abs(scaled) % 1 - 0.5) < _HALFWAY_TOLERANCE) | ~(np.abs(scaled) < _EXACT_SCALED)
+    if uncertain.any():
+        rounded[uncertain] = np.char.mod(float_format, values[uncertain]).astype(np.float64)
+    return rounded
+
+
+def sample_size_for(rows: int, width_sampling: Union[bool, int, None] = None) -> int:
+    """Resolves a width_sampling option into the number of rows to sample from a column
+
+    Arguments:
+        rows {int} -- The number of rows in the column
+
+    Keyword Arguments:
+        width_sampling {Union[bool, int, None]} -- None to sample only above SAMPLING_THRESHOLD rows, True to always sample, False to never sample, or the number of rows to sample (default: {None})
+
+    Returns:
+        int -- The number of rows to sample, or 0 if every row should be measured
+    """
+    if width_sampling is None:
+        sample_size = DEFAULT_SAMPLE_SIZE if rows > SAMPLING_THRESHOLD else 0
+    elif width_sampling is True:
+        sample_size = DEFAULT_SAMPLE_SIZE
+    elif width_sampling is False:
+        sample_size = 0
+    elif isinstance(width_sampling, int) and width_sampling > 0:
+        sample_size = width_sampling
+    else:
+        raise ValueError("width_sampling must be None, a bool or a positive number of rows")
+    #a sample as large as the column is just a slower full scan
+    return sample_size if sample_size < rows else 0
+
+
+def sample_rows(series: Series, sample_size: int, sampling_method: str = "random", random_state: int = None) -> Series:
+    """Selects the rows of a column to measure in place of the whole column.  The first and last HEAD_TAIL_ROWS rows are always included, as is the longest string in bytes of Arrow-backed text, which its offsets give without reading any string.
+
+    Arguments:
+        series {Series} -- The column to sample
+        sample_size {int} -- The number of rows to sample in addition to the rows always included
+
+    Keyword Arguments:
+        sampling_method {str} -- 'random' to sample rows uniformly, or 'stratified' to sample one row from each of sample_size equal runs of rows (default: {'random'})
+        random_state {int} -- Seed for the random number generator, for repeatable samples (default: {None})
+
+    Raises:
+        ValueError: Raised if sampling_method is not 'random' or 'stratified'
+
+    Returns:
+        Series -- The sampled rows
+    """
+    rows = len(series)
+    rng = np.random.default_rng(random_state)
+
+    if sampling_method == "random":
+        positions = rng.choice(rows, size=sample_size, replace=False)
+    elif sampling_method == "stratified":
+        bounds = np.arange(sample_size + 1) * rows // sample_size
+        positions = bounds[:-1] + (rng.random(sample_size) * (bounds[1:] - bounds[:-1])).astype(np.int64)
+    else:
+        raise ValueError("sampling_method must be 'random' or 'stratified'")
+
+    always = [np.arange(min(HEAD_TAIL_ROWS, rows)), np.arange(max(rows - HEAD_TAIL_ROWS, 0), rows)]
+    if _is_arrow_string(series.dtype) and series.notna().any():
+        #the string of the most bytes is the likeliest to be the widest, whatever it is measured by
+        import pyarrow.compute as pc
+        byte_lengths = pc.binary_length(series.array.__arrow_array__()).fill_null(-1)
+        always.append(np.array([np.argmax(byte_lengths.to_numpy())]))
+
+    return series.iloc[np.unique(np.concatenate([positions] + always))]
+
+
+def sampled_column_width(series: Series,
+                         width_sampling: Union[bool, int, None] = None,
+                         sampling_method: str = "random",
+                         random_state: int = None,
+                         max_width: float = None,
+                         **render_options) -> SampledWidth:
+    """Gets the maximum character width of a column, estimating it from a sample of rows when the column is too long to be worth a full scan.  Columns whose dtype has a cheaper exact calculation are never sampled.
+
+    Arguments:
+        series {Series} -- The column to measure
+
+    Keyword Arguments:
+        width_sampling {Union[bool, int, None]} -- None to sample only above SAMPLING_THRESHOLD rows, True to always sample, False to never sample, or the number of rows to sample (default: {None})
+        sampling_method {str} -- 'random' or 'stratified' (default: {'random'})
+        random_state {int} -- Seed for the random number generator, for repeatable samples (default: {None})
+        max_width {float} -- If given, the column is measured CAPPED_CHUNK_ROWS at a time and no more of it is measured once it is this wide, so the width is only known to be at least this (default: {None})
+        **render_options -- How values will be displayed in Excel, as for column_character_width
+
+    Returns:
+        SampledWidth -- The width and the estimated probability it is too narrow for the column
+    """
+    calculator = _exact_calculator(series.dtype, **render_options)
+    if calculator is not None:
+        return SampledWidth(capped_column_width(series, calculator, max_width, **render_options), 0.0)
+
+    sample_size = sample_size_for(len(series), width_sampling)
+    if not sample_size:
+        return SampledWidth(capped_column_width(series, string_width, max_width, **render_options), 0.0)
+
+    sample = sample_rows(series, sample_size, sampling_method, random_state)
+    #the widest row is as likely to be any row as any other, so it is missed unless it is one of the n of N rows sampled.  Ties, and rows always sampled for being long, only make a miss less likely.
+    return SampledWidth(string_width(sample, **render_options), 1 - len(sample) / len(series))
+
+
+def capped_column_width(series: Series, calculator: Callable[..., float], max_width: float = None, **render_options) -> float:
+    """Measures a column with a width calculator, stopping as soon as it is known to be at least max_width wide
+
+    Arguments:
+        series {Series} -- The column to measure
+        calculator {Callable[..., float]} -- The calculator to measure the column with, e.g. one of WIDTH_CALCULATORS or string_width
+
+    Keyword Arguments:
+        max_width {float} -- If given, the column is measured CAPPED_CHUNK_ROWS at a time until a chunk is this wide (default: {None})
+        **render_options -- How values will be displayed in Excel, as for column_character_width
+
+    Returns:
+        float -- The width of the column, or of the chunks measured before it reached max_width
+    """
+    if max_width is None or len(series) <= CAPPED_CHUNK_ROWS:
+        return calculator(series, **render_options)
+    width = np.nan
+    for start in range(0, len(series), CAPPED_CHUNK_ROWS):
+        #the widest of the chunks is the widest of the column, however the column is divided
+        width = _widest([width, calculator(series.iloc[start:start + CAPPED_CHUNK_ROWS], **render_options)])
+        if width >= max_width:
+            break
+    return width
+
+
+def clamp_width(width: float, min_width: float = None, max_width: float = None) -> float:
+    """Limits the width of a column to a range
+
+    Arguments:
+        width {float} -- The width of the column, NaN if it has none
+
+    Keyword Arguments:
+        min_width {float} -- If given, narrower columns (and those with no width) are widened to this (default: {None})
+        max_width {float} -- If given, wider columns are narrowed to this (default: {None})
+
+    Raises:
+        ValueError: Raised if min_width is greater than max_width
+
+    Returns:
+        float -- The width within the range
+    """
+    if min_width is not None and max_width is not None and min_width > max_width:
+        raise ValueError("min_width must not be greater than max_width")
+    if min_width is not None and not width >= min_width:
+        width = min_width
+    if max_width is not None and width > max_width:
+        width = max_width
+    return width
+
+
+def frame_column_widths(df: DataFrame,
+                        n_jobs: int = None,
+                        executor: Union[str, Executor] = "thread",
+                        column_seconds: Dict[str, float] = None,
+                        **width_options) -> Dict[str, SampledWidth]:
+    """Gets the sampled_column_width of every column of a DataFrame, measuring groups of columns in parallel when the frame is large enough to benefit
+
+    Arguments:
+        df {DataFrame} -- The data to measure
+
+    Keyword Arguments:
+        n_jobs {int} -- The number of workers to split the columns between.  None or 1 measures serially, -1 uses one worker per CPU.  A pool never has more workers than CPUs. (default: {None})
+        executor {Union[str, Executor]} -- 'thread' for a pool of threads, 'process' for a pool of processes, or an existing Executor to submit to.  Processes are sent a pickled copy of their columns, which can take longer than measuring them. (default: {'thread'})
+        column_seconds {Dict[str, float]} -- If given, the time in seconds spent measuring each column is added to this, by column label (default: {None})
+        **width_options -- Keyword arguments of sampled_column_width
+
+    Raises:
+        ValueError: Raised if executor is not 'process', 'thread' or an Executor
+
+    Returns:
+        Dict[str, SampledWidth] -- The width of each column by column label
+    """
+    workers = (cpu_count() or 1) if n_jobs == -1 else (n_jobs or 1)
+    if not isinstance(executor, Executor):
+        #workers beyond one per CPU only wait their turn, at the cost of starting them
+        workers = min(workers, cpu_count() or 1)
+    workers = min(workers, len(df.columns))
+    if workers <= 1 or df.size < PARALLEL_THRESHOLD:
+        results = [_partition_widths(df, width_options)]
+    else:
+        results = _parallel_partition_widths(df, workers, executor, width_options)
+
+    widths = {}
+    for result in results:
+        widths.update(result)
+    if column_seconds is not None:
+        column_seconds.update({key:seconds for key, (_, seconds) in widths.items()})
+    #return in the frame's column order, not the order the partitions finished in
+    return {key:widths[key][0] for key in df.columns}
+
+
+def _parallel_partition_widths(df: DataFrame, workers: int, executor: Union[str, Executor], width_options: dict) -> list:
+    #round robin keeps partitions balanced when wide text columns are bunched together
+    partitions = [df.iloc[:, i::workers] for i in range(workers)]
+    if isinstance(executor, Executor):
+        futures = [executor.submit(_partition_widths, partition, width_options) for partition in partitions]
+        results = [future.result() for future in futures]
+    elif executor in ("process", "thread"):
+        pool_type = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_type(workers) as pool:
+            results = list(pool.map(_partition_widths, partitions, [width_options] * workers))
+    else:
+        raise ValueError("executor must be 'process', 'thread' or an Executor")
+    return results
+
+
+def _partition_widths(df: DataFrame, width_options: dict) -> Dict[str, Tuple[SampledWidth, float]]:
+    #module level so process pools can pickle it.  Each column is timed where it is measured, which may be another process.
+    widths = {}
+    for key in df.columns:
+        start = perf_counter()
+        widths[key] = (sampled_column_width(df[key], **width_options), perf_counter() - start)
+    return widths
+
+
+def missing_value_width(series: Series, na_rep: str = None, **render_options) -> float:
+    """Gets the width of a missing value of the column's dtype as rendered by astype(str), or NaN if the column has no missing values
+
+    Arguments:
+        series {Series} -- The column to measure
+
+    Keyword Arguments:
+        na_rep {str} -- If given, missing values are written as this, so this is what is measured (default: {None})
+        **render_options -- How na_rep is measured, as for text_length
+
+    Returns:
+        float -- The width of a missing value, NaN if none are present or missing values are not rendered
+    """
+    if not series.hasnans:
+        return np.nan
+    if na_rep is not None:
+        return text_length(Series([na_rep], dtype=object), **render_options)
+    #measure a single missing value the same way the slow path would, so both agree whatever pandas does with missing values
+    return string_width(series[series.isna()].iloc[:1])
+
+
+def _widest(widths: list) -> float:
+    #NaN marks a width that doesn't apply, e.g. of missing values when there are none
+    return max((width for width in widths if not np.isnan(width)), default=np.nan)
+
+
+def _integer_width(series: Series, **render_options) -> float:
+    values = series.dropna()
+    if values.empty:
+        return string_width(series, **render_options)
+    #the longest integer is always the smallest or the largest, so only those two ever need converting to strings
+    width = max(len(str(int(values.min()))), len(str(int(values.max()))))
+    return _widest([width, missing_value_width(series, **render_options)])
+
+
+def _boolean_width(series: Series, **render_options) -> float:
+    values = series.dropna()
+    if values.empty:
+        return string_width(series, **render_options)
+    #"False" is longer than "True", so only need to know whether any value is False
+    width = len(str(False)) if not values.all() else len(str(True))
+    return _widest([width, missing_value_width(series, **render_options)])
+
+
+def _categorical_width(series: Series, **render_options) -> float:
+    codes = series.cat.codes.to_numpy()
+    #only the categories actually used matter, an unused long category shouldn't widen the column
+    present = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(series.cat.categories)))
+    if (codes < 0).any():
+        present = np.append(present, -1)
+    #one row per distinct value, built the same way so astype(str) renders each exactly as it would in the full column
+    return string_width(Series(Categorical.from_codes(present, dtype=series.dtype)), **render_options)
+
+
+def _datetime_width(series: Series, excel_datetime_format: str = None, **render_options) -> float:
+    if excel_datetime_format is None or not series.notna().any():
+        return string_width(series, **render_options)
+    #every value is displayed through the same format, so the format alone says how wide the column is
+    return _widest([excel_format_width(excel_datetime_format), missing_value_width(series, **render_options)])
+
+
+def _float_width(series: Series, float_format: str = None, inf_rep: str = None, **render_options) -> float:
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = np.isfinite(values)
+    widths = [missing_value_width(series, **render_options)]
+    if finite.any():
+        #floats are written as numbers, which Excel displays in its General format rather than as Python would print them
+        widths.append(excel_general_widths(_round_floats(values[finite], float_format)).max())
+    if (values == np.inf).any():
+        widths.append(len(str(np.inf)) if inf_rep is None else len(inf_rep))
+    if (values == -np.inf).any():
+        widths.append(len(str(-np.inf)) if inf_rep is None else len(inf_rep) + 1)
+    return _widest(widths)
+
+
+def _arrow_string_width(series: Series, na_rep: str = None, **render_options) -> float:
+    #the strings are measured where they are, in the Arrow buffers, rather than converted to Python strings first
+    strings = series.array.__arrow_array__()
+    missing_width = np.nan
+    if strings.null_count:
+        missing_width = text_length(Series([na_rep], dtype=object), **render_options) if na_rep is not None else _missing_string_width(series.dtype)
+    return _widest([longest_arrow_string(strings), missing_width])
+
+
+@lru_cache(maxsize=None)
+def _missing_string_width(dtype) -> float:
+    #every missing value of a dtype renders alike, so one is measured once rather than for every column, which costs more than measuring a short column
+    return string_width(Series([None], dtype=dtype))
+
+
+def longest_arrow_string(strings) -> float:
+    """Gets the length in characters of the longest string of an Arrow string or large_string array.  The length of every string in bytes is the difference of its offsets, which is its length in characters too if every string is ASCII, so only data that is not ASCII has its code points counted.
+
+    Arguments:
+        strings {pyarrow.ChunkedArray} -- The strings to measure
+
+    Returns:
+        float -- The length of the longest string, or NaN if there are none
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    longest = pc.max(pc.binary_length(strings)).as_py()
+    if longest is None:
+        return np.nan
+    for chunk in strings.chunks:
+        _, offsets, data = chunk.buffers()
+        #a chunk may be a slice of larger buffers, of which only the bytes between its first and last offsets are its strings
+        offsets = np.frombuffer(offsets, dtype=np.int64 if pa.types.is_large_string(chunk.type) else np.int32)[chunk.offset:chunk.offset + len(chunk) + 1]
+        #a byte of 128 or more is part of a character encoded in several bytes
+        if data is not None and np.frombuffer(data, dtype=np.uint8)[offsets[0]:offsets[-1]].max(initial=0) >= 128:
+            return pc.max(pc.utf8_length(strings)).as_py()
+    return longest
+
+
+def _is_categorical(dtype) -> bool:
+    return isinstance(dtype, CategoricalDtype)
+
+
+def _is_arrow_string(dtype) -> bool:
+    if isinstance(dtype, StringDtype):
+        return dtype.storage == "pyarrow"
+    if isinstance(dtype, ArrowDtype):
+        import pyarrow as pa
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+    return False
+
+
+#(dtype predicate, calculator) pairs, checked in order.  The first calculator whose predicate matches the column's dtype is used.
+#Calculators take the column and the render options of column_character_width, ignoring any they have no use for.
+#Categoricals come first, as is_bool_dtype also matches a categorical of booleans, which has none of the methods of a boolean column.
+WIDTH_CALCULATORS: List[Tuple[Callable, Callable[..., float]]] = [
+    (_is_categorical, _categorical_width),
+    (is_bool_dtype, _boolean_width),
+    (is_integer_dtype, _integer_width),
+    (is_float_dtype, _float_width),
+    (is_datetime64_any_dtype, _datetime_width),
+]
+
+
+def _exact_calculator(dtype, **render_options) -> Callable[..., float]:
+    for applies_to, calculator in WIDTH_CALCULATORS:
+        if applies_to(dtype):
+            return calculator
+    #Arrow strings are only cheap to measure by counting their code points.  Measured any other way they are text like any other, and may be sampled.
+    if _is_arrow_string(dtype) and not _measures_characters(**render_options):
+        return _arrow_string_width
+    return None
@@ -15,6 +15,7 @@ else:
     setup_args['packages'] = find_packages(exclude = ['contrib', 'docs', 'tests','reports','examples'])
     setup_args['project_urls'] = {'Source':'https://github.com/norweeg/DataFrame-to-Autofit-Xlsx'}
     setup_args['install_requires'] = ['pandas', 'xlsxwriter']
+    setup_args['extras_require'] = {'arrow': ['pyarrow'], 'polars': ['polars', 'pyarrow']}
     setup_args['zip_safe'] = False
 finally:
     setup(**setup_args)
\ No newline at end of file
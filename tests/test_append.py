@@ -0,0 +1,51 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataframe_to_autosize_excel import append_autosize_excel, to_autosize_excel
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _layout(path) -> tuple:
+    ws = openpyxl.load_workbook(path).active
+    cells = [[(cell.value, cell.number_format) for cell in row] for row in ws.iter_rows()]
+    return cells, {letter: dimension.width for letter, dimension in ws.column_dimensions.items()}
+
+
+def test_append_matches_exporting_every_row(tmp_path):
+    df = pd.DataFrame({"when": pd.to_datetime(["2020-01-01 10:00", "2021-05-05 00:00", "2022-12-31 23:59", "2023-01-01 00:00"]),
+                       "day": [date(2020, 1, 1), None, date(1900, 3, 1), date(2024, 2, 29)],
+                       "value": [np.nan, 0.995, np.inf, -np.inf],
+                       "text": ["a", None, "a much longer value", "b"]})
+    options = dict(index=False, na_rep="MISSING", float_format="%.2f", inf_rep="infinity", verbose=False)
+
+    appended = tmp_path / "appended.xlsx"
+    to_autosize_excel(df.iloc[:2], appended, store_widths=True, **options)
+    append_autosize_excel(df.iloc[2:], appended, index=False)
+    whole = tmp_path / "whole.xlsx"
+    to_autosize_excel(df, whole, **options)
+
+    assert _layout(appended) == _layout(whole)
+
+
+def test_appends_match_exporting_every_row_with_index_and_wrapped_text(tmp_path):
+    df = pd.DataFrame({"text": ["a", "two\nlines", " padded & <escaped> ", "=1+1", "three\nmore\nlines"],
+                       "flag": [True, None, False, True, True],
+                       "when": pd.to_datetime(["2020-01-01 00:00", None, "2021-06-30 12:30", "1900-01-01 00:00", "2024-02-29 23:59"])},
+                      index=pd.Index([10, 20, 30, 40, 50], name="id"))
+    options = dict(multiline=True, startrow=1, startcol=2, verbose=False)
+
+    appended = tmp_path / "appended.xlsx"
+    to_autosize_excel(df.iloc[:1], appended, store_widths=True, **options)
+    append_autosize_excel(df.iloc[1:3], appended)
+    append_autosize_excel(df.iloc[3:], appended)
+    whole = tmp_path / "whole.xlsx"
+    to_autosize_excel(df, whole, **options)
+
+    heights = [{row: dimension.height for row, dimension in openpyxl.load_workbook(path).active.row_dimensions.items() if dimension.height}
+               for path in (appended, whole)]
+    assert _layout(appended) == _layout(whole)
+    assert heights[0] == heights[1]
@@ -0,0 +1,48 @@
+import asyncio
+from datetime import date
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from dataframe_to_autosize_excel import to_autosize_excel, to_autosize_excel_async, to_autosize_excel_sheets
+
+pa = pytest.importorskip("pyarrow")
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _layout(workbook: BytesIO) -> tuple:
+    workbook.seek(0)
+    ws = openpyxl.load_workbook(workbook).active
+    cells = [[cell.value for cell in row] for row in ws.iter_rows()]
+    return cells, {letter: dimension.width for letter, dimension in ws.column_dimensions.items()}
+
+
+def test_async_export_of_arrow_table_matches_to_autosize_excel():
+    table = pa.table({"text": ["a", None, "日本語"], "number": [1.5, 2.0, None]})
+    expected = BytesIO()
+    to_autosize_excel(table, expected, verbose=False)
+    written = BytesIO()
+    assert asyncio.run(to_autosize_excel_async(table, written, verbose=False)) is written
+    assert _layout(written) == _layout(expected)
+
+
+def test_sheets_reject_arrow_tables():
+    with pytest.raises(TypeError):
+        to_autosize_excel_sheets({"arrow": pa.table({"a": [1]}), "pandas": pd.DataFrame({"a": [1]})}, BytesIO())
+
+
+@pytest.mark.parametrize("date_type", [pa.date32(), pa.date64()])
+def test_date_columns_are_sized_by_the_date_format(date_type):
+    table = pa.table({"d": pa.array([date(2024, 9, 3), None], date_type)})
+    workbook = BytesIO()
+    to_autosize_excel(table, workbook, excel_date_format="dddd, mmmm dd, yyyy", verbose=False)
+    #as wide as a column of the longest day and month names, not of the 10 characters of an ISO date
+    _, widths = _layout(workbook)
+    assert widths["A"] == _layout(_export_strings(["Wednesday, September 03, 2024"]))[1]["A"]
+
+
+def _export_strings(values: list) -> BytesIO:
+    workbook = BytesIO()
+    to_autosize_excel(pd.DataFrame({"d": values}), workbook, index=False, verbose=False)
+    return workbook
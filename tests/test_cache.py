@@ -0,0 +1,21 @@
+import pandas as pd
+
+from dataframe_to_autosize_excel import WidthCache, estimate_character_widths
+
+
+def _width(values: list, cache: WidthCache) -> float:
+    df = pd.DataFrame({"c": pd.Series(values, dtype=object)})
+    return estimate_character_widths(df, False, ["c"], na_rep="", multiline=True, width_cache=cache)["c"].width
+
+
+def test_missing_values_and_their_spelling_have_different_keys():
+    cache = WidthCache()
+    assert _width([None, 1], cache) == 1
+    assert _width(["None", "1"], cache) == 4
+    assert cache.cache_info().hits == 0
+
+
+def test_equal_columns_hit():
+    cache = WidthCache()
+    assert _width(["ab", None], cache) == _width(["ab", None], cache) == 2
+    assert cache.cache_info().hits == 1
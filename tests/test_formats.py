@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from dataframe_to_autosize_excel.formats import excel_format_width, excel_general_widths
+
+
+@pytest.mark.parametrize("num_format, widest", [("yyyy-mm-dd", "2024-09-30"),
+                                                ("yyyy-mm-dd  hh:mm:ss", "2024-09-30  23:59:59"),
+                                                ("yy/m/d", "24/12/31"),
+                                                ('"Day "d', "Day 31"),
+                                                ('"a;b" yyyy;"never"', "a;b 2024"),
+                                                ("hh\\:mm", "23:59"),
+                                                ("_(yyyy_)", " 2024 "),
+                                                ("* yyyy", "2024"),
+                                                ("[h]:mm", "23:59"),
+                                                ("[Red]hh:mm", "23:59"),
+                                                ("[$-409]mm", "12"),
+                                                ("h:mm AM/PM", "11:59 PM"),
+                                                ("h:mm am/pm", "11:59 PM"),
+                                                ("h:mm A/P", "11:59 P"),
+                                                ("mmm", "Sep"),
+                                                ("mmmm", "September"),
+                                                ("mmmmm", "S"),
+                                                ("ddd, d mmm", "Wed, 31 Sep"),
+                                                ("dddd, mmmm dd, yyyy", "Wednesday, September 30, 2024"),
+                                                ("yyyy;@", "2024")])
+def test_excel_format_width(num_format, widest):
+    assert excel_format_width(num_format) == len(widest)
+
+
+#values and how Excel's General format displays them
+GENERAL = [(0, "0"),
+           (1, "1"),
+           (0.1 + 0.2, "0.3"),
+           (-0.5, "-0.5"),
+           (123456.7, "123456.7"),
+           (-1234567.891, "-1234567.891"),
+           (1234567890.12, "1234567890"),
+           (9999999999.6, "10000000000"),
+           (12345678901, "12345678901"),
+           (123456789012, "1.23457E+11"),
+           (-123456789012, "-1.23457E+11"),
+           (1e15, "1E+15"),
+           (1.5e100, "1.5E+100"),
+           (9.9999951e21, "1E+22"),
+           (9.999994e21, "9.99999E+21"),
+           (0.1234567891234, "0.123456789"),
+           (0.000123456789, "0.000123457"),
+           (0.00001, "0.00001"),
+           (1e-10, "1E-10"),
+           (-1.5e-10, "-1.5E-10")]
+
+
+@pytest.mark.parametrize("value, displayed", GENERAL)
+def test_excel_general_width(value, displayed):
+    assert excel_general_widths(np.array([value]))[0] == len(displayed)
+
+
+def test_excel_general_widths_of_many_values_match_each_alone():
+    values, displayed = zip(*GENERAL)
+    assert excel_general_widths(np.array(values)).tolist() == [len(text) for text in displayed]
@@ -0,0 +1,59 @@
+from datetime import date, datetime
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataframe_to_autosize_excel import to_autosize_excel
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _frame(rows: int = 2_000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    floats = np.round(rng.random(rows) * 100, 3)
+    #halfway cases, which np.round and float_format % value round differently
+    floats[:4] = [0.995, 40.455, 2.675, -0.005]
+    floats[4:7] = [np.nan, np.inf, -np.inf]
+    return pd.DataFrame({"float": floats,
+                         "int": rng.integers(-10**12, 10**12, rows),
+                         "bool": rng.random(rows) < 0.5,
+                         "text": pd.Series(rng.choice(["a", "bb", None, "日本語"], rows), dtype=object),
+                         "datetime": pd.Timestamp("1899-12-30") + pd.to_timedelta(rng.integers(0, 10**11, rows), unit="s"),
+                         "date": pd.Series([date(1900, 1, 1) + pd.Timedelta(days=int(d)) for d in rng.integers(0, 60_000, rows)], dtype=object),
+                         "mixed": pd.Series([1, "x", 2.5, datetime(2020, 1, 1, 12), None] * (rows // 5), dtype=object)},
+                        index=pd.Index(range(rows), name="row"))
+
+
+def _cells(workbook: BytesIO) -> list:
+    workbook.seek(0)
+    ws = openpyxl.load_workbook(workbook).active
+    return [[(cell.value, cell.number_format) for cell in row] for row in ws.iter_rows()]
+
+
+def _export(df: pd.DataFrame, **options) -> list:
+    workbook = BytesIO()
+    to_autosize_excel(df, workbook, verbose=False, **options)
+    return _cells(workbook)
+
+
+@pytest.mark.parametrize("options", [{},
+                                     {"float_format": "%.2f"},
+                                     {"float_format": "%.1e"},
+                                     {"na_rep": "NULL", "inf_rep": "infinity"},
+                                     {"index": False, "header": ["a", "b", "c", "d", "e", "f", "g"]},
+                                     {"startrow": 3, "startcol": 2, "index_label": "label"},
+                                     {"header": False}])
+def test_native_writer_matches_to_excel(options):
+    df = _frame()
+    assert _export(df, native_writer=True, **options) == _export(df, **options)
+
+
+def test_arrow_export_matches_native_writer():
+    pa = pytest.importorskip("pyarrow")
+    df = _frame().drop(columns=["mixed", "date"])
+    df["text"] = df["text"].astype("string[pyarrow]")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for options in [{}, {"float_format": "%.2f"}, {"na_rep": "NULL"}]:
+        assert _export(table, **options) == _export(df, native_writer=True, index=False, **options)
@@ -0,0 +1,28 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataframe_to_autosize_excel import to_autosize_excel, to_autosize_excel_chunked
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _layout(workbook: BytesIO) -> tuple:
+    workbook.seek(0)
+    ws = openpyxl.load_workbook(workbook).active
+    header = [cell.value for cell in next(ws.iter_rows())]
+    return header, {letter: dimension.width for letter, dimension in ws.column_dimensions.items()}
+
+
+@pytest.mark.parametrize("options", [{}, {"na_rep": "MISSING", "float_format": "%.2f", "inf_rep": "infinity"}])
+def test_chunked_export_matches_to_autosize_excel(options):
+    df = pd.DataFrame({"when": pd.to_datetime(["2020-01-01 10:00", "2021-05-05 00:00", "2022-12-31 23:59"]),
+                       "value": [np.nan, 1.5, np.inf],
+                       "rounded": [0.995, 2.0, 40.455]})
+    chunked = BytesIO()
+    to_autosize_excel_chunked([df.iloc[:1], df.iloc[1:]], chunked, **options)
+    whole = BytesIO()
+    to_autosize_excel(df, whole, verbose=False, **options)
+    assert _layout(chunked) == _layout(whole)
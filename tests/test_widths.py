@@ -0,0 +1,27 @@
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from dataframe_to_autosize_excel import maximum_character_widths, to_autosize_excel
+from dataframe_to_autosize_excel.widths import sampled_column_width
+
+
+@pytest.mark.parametrize("values", [[True, False], [True, None], [1, 22, None], [1.5, -0.25]])
+def test_categorical_columns_are_measured_by_their_categories(values):
+    df = pd.DataFrame({"c": pd.Categorical(values)})
+    #the header is narrower than any value, so this is the width every value has as a string, which is what columns were measured by before widths depended on dtype
+    assert maximum_character_widths(df)["c"] == df["c"].astype(str).str.len().max()
+
+
+def test_boolean_categorical_column_exports():
+    pytest.importorskip("openpyxl")
+    to_autosize_excel(pd.DataFrame({"c": pd.Categorical([True, False])}), BytesIO(), verbose=False)
+
+
+def test_sampled_width_reports_the_chance_the_column_is_wider():
+    series = pd.Series([f"{row:07d}" for row in range(200_000)], dtype=object)
+    estimate = sampled_column_width(series, random_state=0)
+    assert estimate.width == 7
+    assert 0.9 < estimate.miss_probability < 1
+    assert sampled_column_width(series, width_sampling=False) == (7, 0)